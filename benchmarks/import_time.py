@@ -0,0 +1,75 @@
+# benchmarks/import_time.py
+"""
+Проверка времени холодного импорта модулей пакета (по данным python -X importtime).
+
+Каждый модуль импортируется в отдельном процессе; скрипт завершается с кодом 1, если
+суммарное время импорта превышает бюджет или если модуль тянет за собой тяжелые
+зависимости, которые должны загружаться лениво.
+
+    python benchmarks/import_time.py [--scale 2.0] [--repeat 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Модуль -> (бюджет в мс, модули, которые не должны импортироваться)
+BUDGETS = {
+    "sales_forecast.gui": (150, ["pandas", "numpy", "openpyxl", "sklearn", "matplotlib"]),
+    "sales_forecast.forecast": (900, ["sklearn", "matplotlib", "openpyxl", "tkinter"]),
+    "sales_forecast.cli": (900, ["sklearn", "matplotlib", "openpyxl", "tkinter"]),
+}
+
+
+def measure(module):
+    """Возвращает (время импорта модуля в мс, множество импортированных модулей верхнего уровня)."""
+    env = dict(os.environ, PYTHONPATH=str(REPO_ROOT))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, env=env, check=True
+    )
+    total_us = None
+    imported = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:"):].split("|"))
+        imported.add(name.split(".")[0])
+        if name == module:
+            total_us = int(cumulative)
+    return total_us / 1000, imported
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=float, default=1.0, help="Множитель бюджетов для медленных машин")
+    parser.add_argument("--repeat", type=int, default=3, help="Число замеров; берется минимум")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module, (budget_ms, forbidden) in BUDGETS.items():
+        timings = []
+        for _ in range(args.repeat):
+            elapsed_ms, imported = measure(module)
+            timings.append(elapsed_ms)
+        elapsed_ms = min(timings)
+        budget = budget_ms * args.scale
+        leaked = sorted(set(forbidden) & imported)
+
+        status = "OK"
+        if elapsed_ms > budget or leaked:
+            status = "FAIL"
+            failed = True
+        print(f"{status:4} {module:28} {elapsed_ms:8.1f} мс (бюджет {budget:.0f} мс)")
+        if leaked:
+            print(f"     лишние импорты: {', '.join(leaked)}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
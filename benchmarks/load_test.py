@@ -0,0 +1,184 @@
+# benchmarks/load_test.py
+"""
+Нагрузочный тест локального сервиса прогноза (sales_forecast.service).
+
+Загружает синтетическую историю нескольких магазинов как наборы данных и шлет
+запросы /forecast с заданным числом одновременных соединений (keep-alive).
+Печатает p50/p99 задержки и число запросов в секунду, отдельно для попаданий
+в кэш и промахов.
+
+    python benchmarks/load_test.py --spawn --requests 2000 --concurrency 16
+    python benchmarks/load_test.py --port 8765 --stores 50 --unique 0.1
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synthetic import generate_sales  # noqa: E402
+
+
+class Connection:
+    """Одно keep-alive соединение HTTP/1.1 к сервису."""
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def request(self, method, path, payload=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = (
+            f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n\r\n"
+        )
+        self.writer.write(head.encode("latin-1") + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        data = await self.reader.readexactly(int(headers.get("content-length", 0)))
+        return status, headers, data
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+async def wait_ready(host, port, timeout=30.0):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        connection = Connection(host, port)
+        try:
+            status, _, _ = await connection.request("GET", "/health")
+            if status == 200:
+                return
+        except OSError:
+            await asyncio.sleep(0.2)
+        finally:
+            connection.close()
+    raise RuntimeError(f"Сервис на {host}:{port} не отвечает")
+
+
+async def upload_datasets(host, port, stores, years):
+    connection = Connection(host, port)
+    keys = []
+    try:
+        for store in range(stores):
+            df = generate_sales(years=years, seed=store)
+            df["По дням"] = df["По дням"].dt.strftime("%Y-%m-%d")
+            status, _, data = await connection.request("POST", "/datasets", {"history": df.to_dict(orient="list")})
+            if status != 200:
+                raise RuntimeError(f"Ошибка загрузки набора данных: {data.decode('utf-8')}")
+            keys.append(json.loads(data)["key"])
+    finally:
+        connection.close()
+    return keys
+
+
+async def run_load(host, port, keys, total, concurrency, horizon, unique, seed):
+    rng = random.Random(seed)
+    payloads = []
+    for i in range(total):
+        payload = {"dataset": rng.choice(keys), "horizon": horizon}
+        if rng.random() < unique:
+            # Уникальный параметр - гарантированный промах кэша
+            payload["floor_factor"] = 1.0 + i * 1e-6
+        payloads.append(payload)
+
+    queue = asyncio.Queue()
+    for payload in payloads:
+        queue.put_nowait(payload)
+    samples = []
+
+    async def client():
+        connection = Connection(host, port)
+        try:
+            while not queue.empty():
+                payload = queue.get_nowait()
+                started = time.perf_counter()
+                status, headers, _ = await connection.request("POST", "/forecast", payload)
+                samples.append((time.perf_counter() - started, status, headers.get("x-cache", "")))
+        finally:
+            connection.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return samples, time.perf_counter() - started
+
+
+def report(samples, elapsed):
+    print(f"{len(samples)} запросов за {elapsed:.2f} с: {len(samples) / elapsed:.1f} запросов/с")
+    errors = sum(1 for _, status, _ in samples if status != 200)
+    if errors:
+        print(f"  ошибок: {errors}")
+    groups = {"все": [latency for latency, _, _ in samples]}
+    for kind in ("hit", "miss"):
+        groups[kind] = [latency for latency, status, cache in samples if status == 200 and cache == kind]
+    for name, latencies in groups.items():
+        if not latencies:
+            continue
+        p50, p99 = np.percentile(np.array(latencies) * 1000, [50, 99])
+        print(f"  {name:5} n={len(latencies):6}  p50 {p50:8.2f} мс  p99 {p99:8.2f} мс")
+
+
+async def main_async(args):
+    process = None
+    if args.spawn:
+        process = subprocess.Popen(
+            [sys.executable, "-m", "sales_forecast.service", "--port", str(args.port), "--workers", str(args.workers),
+             "--log-level", "WARNING"],
+            cwd=REPO_ROOT,
+        )
+    try:
+        await wait_ready(args.host, args.port)
+        keys = await upload_datasets(args.host, args.port, args.stores, args.years)
+        samples, elapsed = await run_load(
+            args.host, args.port, keys, args.requests, args.concurrency, args.horizon, args.unique, args.seed
+        )
+        report(samples, elapsed)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--spawn", action="store_true", help="Запустить сервис в отдельном процессе на время теста")
+    parser.add_argument("--workers", type=int, default=0, help="Процессов сервиса при --spawn (0 - по числу ядер)")
+    parser.add_argument("--stores", type=int, default=20, help="Число магазинов (наборов данных)")
+    parser.add_argument("--years", type=float, default=3, help="Длина истории магазина в годах")
+    parser.add_argument("--requests", type=int, default=1000, help="Всего запросов /forecast")
+    parser.add_argument("--concurrency", type=int, default=16, help="Одновременных соединений")
+    parser.add_argument("--horizon", type=int, default=365)
+    parser.add_argument("--unique", type=float, default=0.0, help="Доля запросов с уникальными параметрами (промахи)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
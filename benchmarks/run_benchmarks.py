@@ -0,0 +1,258 @@
+# benchmarks/run_benchmarks.py
+"""
+Замер этапов конвейера на синтетических данных: разбор Excel, очистка, обучение,
+корректировка по истории, корректировка 15-го числа и выгрузка.
+
+Для каждого размера (число строк истории) фиксируются время и пиковая память
+(tracemalloc, отдельным проходом, чтобы трассировка не искажала время) каждого этапа.
+Прогноз считается пачкой (BatchForecaster) и, для сравнения, по магазинам через
+SalesForecaster: его этапы (fit, predict, floor, fifteenth, ...) берутся из RunMetrics
+и суммируются по первым --single-stores магазинам.
+Результаты сохраняются в JSON для сравнения версий:
+
+    python benchmarks/run_benchmarks.py --sizes 1000 100000 10000000 --output benchmarks/results/HEAD.json
+    python benchmarks/run_benchmarks.py --sizes 1000 --compare benchmarks/results/HEAD.json
+"""
+
+import argparse
+import json
+import math
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from sales_forecast.batch import BatchForecaster  # noqa: E402
+from sales_forecast.data_loader import clean_sales_frame  # noqa: E402
+from sales_forecast.excel_exporter import EXCEL_MAX_ROWS, ExcelExporter  # noqa: E402
+from sales_forecast.forecast import SalesForecaster  # noqa: E402
+from sales_forecast.instrumentation import RunMetrics  # noqa: E402
+from sales_forecast.models import DEFAULT_MODEL, MODELS  # noqa: E402
+from synthetic import generate_sales, write_export  # noqa: E402
+
+# Этапы BatchForecaster.forecast (по именам checkpoint) -> ключи в отчете
+FORECAST_STAGES = {
+    "Отсечение выбросов": "outlier_filter",
+    "Обучение модели": "fit",
+    "Прогноз тренда": "predict",
+    "Корректировка по истории": "floor",
+    "Корректировка 15-го числа": "fifteenth",
+    "Сборка таблицы": "assemble",
+}
+
+
+class StageRecorder:
+    """Засекает время и пиковую память между соседними вызовами checkpoint."""
+
+    def __init__(self, trace_memory):
+        self.trace_memory = trace_memory
+        self.stages = {}
+        self._current = None
+        self._started = None
+
+    def start(self, name):
+        self.stop()
+        self._current = name
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        self._started = time.perf_counter()
+
+    def stop(self):
+        if self._current is None:
+            return
+        elapsed = time.perf_counter() - self._started
+        record = {"wall_s": elapsed}
+        if self.trace_memory:
+            record["peak_mb"] = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        self.stages[self._current] = record
+        self._current = None
+
+    def checkpoint(self, stage):
+        self.start(FORECAST_STAGES.get(stage, stage))
+
+
+def shape_for(rows, years):
+    # Столько дней, сколько помещается в years лет, остальное добираем магазинами
+    days = min(rows, int(round(years * 365.25)))
+    return days, max(1, math.ceil(rows / days))
+
+
+def run_single(df, n_stores, trace_memory, model=DEFAULT_MODEL):
+    """
+    Прогноз SalesForecaster по первым n_stores магазинам по отдельности.
+
+    Returns:
+        dict: 'stores' - число магазинов, 'stages' - этапы RunMetrics: суммарное время по магазинам
+        (wall_s), среднее на магазин (per_store_s) и максимум пиковой памяти (peak_mb).
+    """
+    stages = {}
+    n_done = 0
+    for _, rows in df.groupby("store_id", sort=True, observed=True):
+        if n_done >= n_stores:
+            break
+        metrics = RunMetrics(trace_memory=trace_memory)
+        SalesForecaster(rows.drop(columns="store_id")).forecast(plot=False, metrics=metrics, model=model)
+        for record in metrics.stages:
+            total = stages.setdefault(record.name, {"wall_s": 0.0})
+            total["wall_s"] += record.wall_s
+            if trace_memory:
+                total["peak_mb"] = max(total.get("peak_mb", 0.0), record.peak_mb or 0.0)
+        n_done += 1
+    for total in stages.values():
+        total["per_store_s"] = total["wall_s"] / n_done
+    return {"stores": n_done, "stages": stages}
+
+
+def run_size(rows, years, max_excel_rows, workdir, trace_memory, model=DEFAULT_MODEL, single_stores=20):
+    days, stores = shape_for(rows, years)
+    raw = generate_sales(days=days, stores=stores, seed=rows)
+    recorder = StageRecorder(trace_memory)
+    if trace_memory:
+        tracemalloc.start()
+    try:
+        if len(raw) <= min(max_excel_rows, EXCEL_MAX_ROWS - 1):
+            source = Path(workdir) / f"history_{rows}.xlsx"
+            write_export(raw, source)
+            recorder.start("excel_parse")
+            raw = pd.read_excel(source, engine="openpyxl")
+            recorder.stop()
+
+        recorder.start("clean")
+        df = clean_sales_frame(raw)
+        if "store_id" not in df.columns:
+            df["store_id"] = "store_00000"
+        recorder.stop()
+
+        forecaster = BatchForecaster(df)
+        recorder.start("prepare")
+        forecast_df = forecaster.forecast(checkpoint=recorder.checkpoint, model=model)
+        recorder.stop()
+
+        single = run_single(df, single_stores, trace_memory, model) if single_stores else None
+
+        use_excel = len(forecast_df) <= min(max_excel_rows, EXCEL_MAX_ROWS - 1)
+        target = Path(workdir) / f"forecast_{rows}.{'xlsx' if use_excel else 'csv'}"
+        recorder.start("export_xlsx" if use_excel else "export_csv")
+        ExcelExporter.write(forecast_df, target)
+        recorder.stop()
+    finally:
+        if trace_memory:
+            tracemalloc.stop()
+
+    return {
+        "rows_in": len(df),
+        "rows_out": len(forecast_df),
+        "stores": stores,
+        "days": days,
+        "stages": recorder.stages,
+        "single": single,
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline):
+    print(f"\nСравнение с {baseline['meta'].get('revision')} (время: текущее / базовое)")
+    for size, result in current["results"].items():
+        base = baseline["results"].get(size)
+        if base is None:
+            continue
+        # Этапы пачки и этапы SalesForecaster (с префиксом single.); в старых отчетах single нет
+        sections = [("", result["stages"], base["stages"])]
+        if result.get("single") and base.get("single"):
+            sections.append(("single.", result["single"]["stages"], base["single"]["stages"]))
+        for prefix, stages, base_stages in sections:
+            for stage, record in stages.items():
+                base_record = base_stages.get(stage)
+                if base_record is None:
+                    continue
+                ratio = record["wall_s"] / base_record["wall_s"] if base_record["wall_s"] else float("inf")
+                name = prefix + stage
+                print(f"  {size:>10} {name:22} {record['wall_s']:9.4f} с / {base_record['wall_s']:9.4f} с  x{ratio:.2f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000, 10000000], help="Строк истории")
+    parser.add_argument("--years", type=float, default=3, help="Длина истории одного магазина в годах")
+    parser.add_argument("--max-excel-rows", type=int, default=200000,
+                        help="Выше этого размера разбор и выгрузка Excel пропускаются (выгрузка - в csv)")
+    parser.add_argument("--model", choices=sorted(MODELS), default=DEFAULT_MODEL, help="Модель тренда")
+    parser.add_argument("--single-stores", type=int, default=20,
+                        help="Сколько магазинов прогнозировать через SalesForecaster для сравнения (0 - не считать)")
+    parser.add_argument("--skip-memory", action="store_true", help="Не делать проход с замером памяти")
+    parser.add_argument("--output", help="Файл JSON с результатами")
+    parser.add_argument("--compare", help="JSON предыдущего запуска для сравнения")
+    args = parser.parse_args(argv)
+
+    report = {
+        "meta": {
+            "revision": git_revision(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "machine": platform.machine(),
+            "model": args.model,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as workdir:
+        for rows in args.sizes:
+            result = run_size(
+                rows, args.years, args.max_excel_rows, workdir, trace_memory=False, model=args.model,
+                single_stores=args.single_stores
+            )
+            if not args.skip_memory:
+                traced = run_size(
+                    rows, args.years, args.max_excel_rows, workdir, trace_memory=True, model=args.model,
+                    single_stores=args.single_stores
+                )
+                for stage, record in traced["stages"].items():
+                    result["stages"][stage]["peak_mb"] = record["peak_mb"]
+                if result["single"]:
+                    for stage, record in traced["single"]["stages"].items():
+                        result["single"]["stages"][stage]["peak_mb"] = record["peak_mb"]
+            report["results"][str(rows)] = result
+
+            print(f"{rows} строк ({result['stores']} маг. x {result['days']} дн.) -> {result['rows_out']} строк прогноза")
+            for stage, record in result["stages"].items():
+                memory = f"{record['peak_mb']:9.1f} МБ" if "peak_mb" in record else ""
+                print(f"  {stage:16} {record['wall_s']:9.4f} с {memory}")
+            if result["single"]:
+                single = result["single"]
+                print(f"  SalesForecaster по {single['stores']} маг. (сумма / на магазин):")
+                for stage, record in single["stages"].items():
+                    memory = f"{record['peak_mb']:9.1f} МБ" if "peak_mb" in record else ""
+                    print(f"    {stage:14} {record['wall_s']:9.4f} с {record['per_store_s']:9.4f} с {memory}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            compare(report, json.load(f))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,94 @@
+# benchmarks/synthetic.py
+"""
+Генератор синтетических дневных отчетов о продажах в формате выгрузки
+("По дням", "Количество чеков", "Средняя сумма чека", "Сумма продажи").
+
+    python benchmarks/synthetic.py sales.xlsx --years 5 --stores 3 --noise 0.1
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+EXPORT_COLUMNS = ["По дням", "Количество чеков", "Средняя сумма чека", "Сумма продажи"]
+
+
+def generate_sales(years=3, stores=1, noise=0.1, start="2022-01-01", days=None, spike_factor=2.0,
+                   outlier_rate=0.005, seed=0):
+    """
+    Дневные продажи с трендом, недельной и годовой сезонностью, шумом и всплесками 15-го числа.
+
+    Args:
+        years (int): Длина истории в годах (если не задано days).
+        stores (int): Число магазинов; при stores > 1 добавляется колонка store_id.
+        noise (float): Относительный уровень шума.
+        start (str): Первая дата истории.
+        days (int): Точная длина истории в днях (вместо years).
+        spike_factor (float): Во сколько раз 15-го числа растет число чеков.
+        outlier_rate (float): Доля дней с аномальным средним чеком (для фильтра выбросов).
+        seed (int): Зерно генератора случайных чисел.
+
+    Returns:
+        pd.DataFrame: Длинная таблица в формате выгрузки, отсортированная по магазину и дате.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start, periods=days if days is not None else int(round(years * 365.25)))
+    n_days = len(dates)
+    t = np.arange(n_days)
+
+    # Параметры магазинов: масштаб трафика, уровень и рост среднего чека
+    base_checks = rng.uniform(150, 600, stores)[:, None]
+    base_avg_check = rng.uniform(2800, 4500, stores)[:, None]
+    growth = rng.uniform(0.0, 0.0004, stores)[:, None]
+
+    weekly = 1 + 0.15 * np.isin(dates.dayofweek.to_numpy(), [4, 5])
+    yearly = 1 + 0.1 * np.sin(2 * np.pi * (dates.dayofyear.to_numpy() - 80) / 365.25)
+    spikes = np.where(dates.day.to_numpy() == 15, spike_factor, 1.0)
+
+    checks = base_checks * (1 + growth * t) * weekly * yearly * spikes
+    checks = checks * (1 + noise * rng.standard_normal((stores, n_days)))
+    checks = np.maximum(np.round(checks), 1).astype(np.int64)
+
+    avg_check = base_avg_check * (1 + growth * t) * (1 + 0.5 * noise * rng.standard_normal((stores, n_days)))
+    outliers = rng.random((stores, n_days)) < outlier_rate
+    avg_check[outliers] *= rng.choice([0.3, 2.5], outliers.sum())
+    avg_check = np.round(avg_check, 2)
+
+    df = pd.DataFrame({
+        "По дням": np.tile(dates.to_numpy(), stores),
+        "Количество чеков": checks.ravel(),
+        "Средняя сумма чека": avg_check.ravel(),
+        "Сумма продажи": np.round(checks * avg_check, 2).ravel(),
+    })
+    if stores > 1:
+        df.insert(0, "store_id", np.repeat([f"store_{i:05d}" for i in range(stores)], n_days))
+    return df
+
+
+def write_export(df, file_path):
+    """Сохраняет таблицу как Excel-выгрузку, которую читает DataLoader."""
+    df.to_excel(file_path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("output", help="Выходной файл (.xlsx или .csv)")
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--stores", type=int, default=1)
+    parser.add_argument("--noise", type=float, default=0.1)
+    parser.add_argument("--start", default="2022-01-01")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    df = generate_sales(years=args.years, stores=args.stores, noise=args.noise, start=args.start, seed=args.seed)
+    if args.output.endswith(".csv"):
+        df.to_csv(args.output, index=False)
+    else:
+        write_export(df, args.output)
+    print(f"{args.output}: {len(df)} строк")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,11 +1,32 @@
+import logging
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import pandas as pd
-from openpyxl import load_workbook
+from sales_forecast.cache import FrameCache
+from sales_forecast.excel_exporter import ExcelExporter
+
+logger = logging.getLogger(__name__)
+
+
+def read_with_dates(file_path):
+    # Читаем Excel-файл
+    df = pd.read_excel(file_path)
+
+    # Отладочное сообщение: показываем исходный формат столбца "По дням"
+    logger.debug("Исходный формат столбца 'По дням':\n%s", df.iloc[:, 1].head())
+
+    # Преобразуем столбец "По дням" (второй столбец, индекс 1) в формат даты
+    df.iloc[:, 1] = pd.to_datetime(df.iloc[:, 1], format='%Y-%m-%d %H:%M:%S', errors='coerce')
+
+    # Отладочное сообщение: показываем формат даты после преобразования
+    logger.debug("Формат даты после преобразования в datetime:\n%s", df.iloc[:, 1].head())
+    return df
+
 
 class DatePreprocessorGUI:
     def __init__(self, root):
         self.root = root
+        self.cache = FrameCache()
         self.root.title("Преобразователь дат Excel")
         self.root.geometry("400x200")
 
@@ -37,22 +58,8 @@ class DatePreprocessorGUI:
             return
 
         try:
-            # Читаем Excel-файл
-            df = pd.read_excel(self.file_path)
-
-            # Отладочное сообщение: показываем исходный формат столбца "По дням"
-            print("Исходный формат столбца 'По дням':")
-            print(df.iloc[:, 1].head())
-
-            # Преобразуем столбец "По дням" (второй столбец, индекс 1) в формат даты
-            df.iloc[:, 1] = pd.to_datetime(df.iloc[:, 1], format='%Y-%m-%d %H:%M:%S', errors='coerce')
-
-            # Отладочное сообщение: показываем формат даты после преобразования
-            print("Формат даты после преобразования в datetime:")
-            print(df.iloc[:, 1].head())
-
-            # Здесь оставляем данные как datetime, чтобы Excel применял форматирование,
-            # которое потом изменим на текстовый.
+            # Читаем Excel-файл (повторный запуск на том же файле берет таблицу из кэша)
+            df = self.cache.get_or_load(self.file_path, read_with_dates, namespace="date_preprocessor")
 
             # Открываем диалоговое окно для сохранения файла
             output_path = filedialog.asksaveasfilename(
@@ -62,25 +69,8 @@ class DatePreprocessorGUI:
             )
 
             if output_path:
-                # Сохраняем обработанный файл через ExcelWriter без указания datetime_format
-                with pd.ExcelWriter(output_path, engine='openpyxl') as writer:
-                    df.to_excel(writer, index=False)
-
-                # Открываем файл через openpyxl для изменения формата ячеек столбца "По дням"
-                wb = load_workbook(output_path)
-                ws = wb.active
-
-                # Предполагаем, что столбец "По дням" находится во втором столбце (B)
-                for row in ws.iter_rows(min_row=2, min_col=2, max_col=2):
-                    for cell in row:
-                        # Если значение ячейки является датой, преобразуем его в строку в нужном формате
-                        if cell.value is not None and hasattr(cell.value, 'strftime'):
-                            cell.value = cell.value.strftime('%Y-%m-%d')
-                        else:
-                            cell.value = str(cell.value)
-                        # Устанавливаем текстовый формат ячейки
-                        cell.number_format = '@'
-                wb.save(output_path)
+                # Сохраняем файл за один проход: столбец "По дням" (второй, B) записывается текстом "YYYY-MM-DD"
+                ExcelExporter.write(df, output_path, text_date_columns=[df.columns[1]])
 
                 messagebox.showinfo("Успех", f"Обработанный файл сохранен как: {output_path}")
                 self.save_button.config(state='disabled')
@@ -0,0 +1,4 @@
+# sales_forecast/__main__.py
+from sales_forecast.cli import main
+
+raise SystemExit(main())
@@ -1,41 +1,245 @@
 # sales_forecast/aggregator.py
+import logging
+
+import numpy as np
 import pandas as pd
 
+from sales_forecast.data_loader import COLUMN_RENAMES, parse_numbers
+
+logger = logging.getLogger(__name__)
+
+# Версия схемы очищенной таблицы; увеличивать при изменении логики разбора (сбрасывает кэш)
+SCHEMA_VERSION = 3
+
+# Уровни свертки: имя -> частота начала периода (неделя начинается в понедельник)
+ROLLUP_LEVELS = {
+    "daily": "D",
+    "weekly": "W",
+    "monthly": "M",
+    "yearly": "Y",
+}
+
+# Названия месяцев в выгрузках: родительный падеж ("1 января 2024 г."), именительный и сокращения
+_MONTH_NAMES = [
+    ("января", "январь", "янв"),
+    ("февраля", "февраль", "фев"),
+    ("марта", "март", "мар"),
+    ("апреля", "апрель", "апр"),
+    ("мая", "май"),
+    ("июня", "июнь", "июн"),
+    ("июля", "июль", "июл"),
+    ("августа", "август", "авг"),
+    ("сентября", "сентябрь", "сен", "сент"),
+    ("октября", "октябрь", "окт"),
+    ("ноября", "ноябрь", "ноя"),
+    ("декабря", "декабрь", "дек"),
+]
+MONTH_NUMBERS = {name: number for number, names in enumerate(_MONTH_NAMES, start=1) for name in names}
+
+
+def parse_russian_dates(values):
+    """
+    Разбирает даты вида '1 января 2024 г.' за один проход: название месяца переводится в номер
+    поиском по словарю MONTH_NUMBERS для всего столбца, без перебора форматов.
+
+    Значения, которые уже являются датами (или записаны цифрами), разбираются pd.to_datetime.
+
+    Returns:
+        pd.Series: Даты datetime64; нераспознанные значения - NaT.
+    """
+    if values.dtype.kind == "M":
+        return values
+    parts = values.astype(str).str.lower().str.extract(r"^\s*(\d{1,2})\s+([а-яё]+)\.?\s+(\d{4})")
+    dates = pd.to_datetime(
+        pd.DataFrame({
+            "year": pd.to_numeric(parts[2]),
+            "month": parts[1].map(MONTH_NUMBERS),
+            "day": pd.to_numeric(parts[0]),
+        }),
+        errors="coerce"
+    )
+    rest = dates.isna() & values.notna() & parts[0].isna()
+    if rest.any():
+        # Формат определяется для каждого значения: pandas иначе берет формат первого значения для всех.
+        # dayfirst - только для дат с днем в начале ("05.04.2024"), с ним "2024-03-05" читается как 3 мая
+        year_first = values.astype(str).str.match(r"^\s*\d{4}-")
+        for mask, dayfirst in [(rest & year_first, False), (rest & ~year_first, True)]:
+            if mask.any():
+                dates[mask] = pd.to_datetime(values[mask], errors="coerce", format="mixed", dayfirst=dayfirst)
+    return dates
+
+
+def build_rollups(df, store_column="store_id", levels=tuple(ROLLUP_LEVELS)):
+    """
+    Свертки дневной истории по магазинам: дни, недели, месяцы и годы.
+
+    Строки истории группируются один раз - до дней (несколько строк одного дня складываются);
+    недели, месяцы и годы собираются из дневных сумм через np.bincount без повторной группировки.
+
+    Args:
+        df (pd.DataFrame): История ('date', 'checks', 'total_sales' или заголовки выгрузки);
+            без store_column считается одним магазином.
+        store_column (str): Столбец магазина.
+        levels: Нужные уровни из ROLLUP_LEVELS.
+
+    Returns:
+        dict: Уровень -> pd.DataFrame с колонками ([store_column,] 'period', 'days', 'checks',
+        'total_sales', 'avg_check'): period - первый день периода, days - дней с данными,
+        avg_check = total_sales / checks.
+
+    Raises:
+        ValueError: Если уровень неизвестен.
+    """
+    unknown = [level for level in levels if level not in ROLLUP_LEVELS]
+    if unknown:
+        raise ValueError(f"Неизвестные уровни свертки: {unknown}")
+    df = df.rename(columns=COLUMN_RENAMES)
+    has_store = store_column in df.columns
+    if has_store:
+        codes, stores = pd.factorize(df[store_column], sort=True)
+    else:
+        codes, stores = np.zeros(len(df), dtype=np.intp), None
+    days = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+
+    # Единственная группировка строк истории: (магазин, день)
+    day_codes, day_numbers, day_index = _group_keys(codes, days)
+    sums = {
+        column: np.bincount(day_index, weights=np.nan_to_num(df[column].to_numpy(dtype=float)),
+                            minlength=len(day_codes))
+        for column in ["checks", "total_sales"]
+    }
+    day_dates = day_numbers.astype("datetime64[D]")
+
+    rollups = {}
+    for level in levels:
+        if level == "daily":
+            period_codes, periods = day_codes, day_dates
+            period_days = np.ones(len(day_codes), dtype=np.int64)
+            period_sums = sums
+        else:
+            starts = _period_start(day_dates, ROLLUP_LEVELS[level])
+            period_codes, period_numbers, index = _group_keys(day_codes, starts.astype(np.int64))
+            periods = period_numbers.astype("datetime64[D]")
+            period_days = np.bincount(index, minlength=len(period_codes))
+            period_sums = {
+                column: np.bincount(index, weights=values, minlength=len(period_codes))
+                for column, values in sums.items()
+            }
+
+        columns = {}
+        if has_store:
+            columns[store_column] = np.asarray(stores)[period_codes]
+        columns["period"] = periods.astype("datetime64[s]")
+        columns["days"] = period_days
+        columns["checks"] = period_sums["checks"]
+        columns["total_sales"] = period_sums["total_sales"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns["avg_check"] = period_sums["total_sales"] / period_sums["checks"]
+        rollups[level] = pd.DataFrame(columns)
+    return rollups
+
+
+def _group_keys(codes, values):
+    """
+    Уникальные пары (код, значение) и номер пары для каждой строки.
+
+    Пара упаковывается в одно целое int64, поэтому сортировка идет по одномерному массиву.
+    """
+    if len(values) == 0:
+        return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.intp)
+    base = values.min()
+    span = values.max() - base + 1
+    keys, index = np.unique(np.asarray(codes, dtype=np.int64) * span + (values - base), return_inverse=True)
+    return keys // span, keys % span + base, index
+
+
+def _period_start(days, freq):
+    # Первый день недели (понедельник), месяца или года для массива datetime64[D]
+    if freq == "W":
+        # 1970-01-01 - четверг: сдвиг на 3 дня дает понедельник = 0
+        return days - (days.astype(np.int64) + 3) % 7
+    return days.astype(f"datetime64[{freq}]").astype("datetime64[D]")
+
+
 class SalesDataAggregator:
-    def __init__(self, file_path):
+    """
+    Разбор месячного отчета (даты вида '1 января 2024 г.') и свертки по неделям, месяцам и годам.
+
+    Таблица и свертки кэшируются: в памяти на время жизни объекта и, если передан cache
+    (FrameCache), на диске по хешу содержимого файла.
+    """
+
+    def __init__(self, file_path, cache=None):
         self.file_path = file_path
+        self.cache = cache
         self.df = None
+        self.rollups = {}
 
     def preprocess(self):
+        if self.df is not None:
+            return self.df
+        if self.cache is not None:
+            self.df = self.cache.get_or_load(self.file_path, self._parse, namespace="aggregator", version=SCHEMA_VERSION)
+        else:
+            self.df = self._parse(self.file_path)
+        logger.debug("Данные успешно обработаны: %d строк", len(self.df))
+        return self.df
+
+    def rollup(self, level="monthly"):
+        """
+        Свертка истории уровня level ('daily', 'weekly', 'monthly', 'yearly'), см. build_rollups.
+
+        Raises:
+            ValueError: Если уровень неизвестен.
+        """
+        if level not in ROLLUP_LEVELS:
+            raise ValueError(f"Неизвестный уровень свертки: {level}")
+        if level not in self.rollups:
+            # Все уровни считаются за один проход и запоминаются
+            if self.cache is None:
+                self.rollups.update(build_rollups(self.preprocess()))
+            else:
+                # На диске каждый уровень - отдельная запись; при промахе свертки строятся один раз на все уровни
+                built = {}
+
+                def load(name):
+                    if not built:
+                        built.update(build_rollups(self.preprocess()))
+                    return built[name]
+
+                for name in ROLLUP_LEVELS:
+                    self.rollups[name] = self.cache.get_or_load(
+                        self.file_path, lambda _, name=name: load(name),
+                        namespace=f"aggregator_{name}", version=SCHEMA_VERSION
+                    )
+        return self.rollups[level]
+
+    @staticmethod
+    def _parse(file_path):
         # Загружаем файл, начиная со второго столбца (B:E) и второй строки
-        self.df = pd.read_excel(self.file_path, usecols="B:E", skiprows=1)
+        df = pd.read_excel(file_path, usecols="B:E", skiprows=1)
 
         # Переименовываем столбцы
-        self.df.columns = ["date", "checks", "avg_check", "total_sales"]
+        df.columns = ["date", "checks", "avg_check", "total_sales"]
 
         # Убираем строки, где дата отсутствует
-        self.df = self.df.dropna(subset=["date"])
+        df = df.dropna(subset=["date"])
 
-        # Преобразуем дату
-        try:
-            self.df["date"] = pd.to_datetime(self.df["date"], format="%d %B %Y г.", dayfirst=True)
-        except ValueError:
-            self.df["date"] = pd.to_datetime(self.df["date"], format="%d %B %Y", dayfirst=True, errors="coerce")
+        # Преобразуем дату: названия месяцев - поиском по словарю для всего столбца
+        df["date"] = parse_russian_dates(df["date"])
 
         # Проверяем ошибки преобразования дат
-        if self.df["date"].isna().sum() > 0:
-            print("Ошибка преобразования дат! Проблемные строки:")
-            print(self.df[self.df["date"].isna()])
+        if df["date"].isna().sum() > 0:
+            logger.error("Ошибка преобразования дат! Проблемные строки:\n%s", df[df["date"].isna()])
             raise ValueError("Ошибка в формате дат, проверьте исходные данные.")
 
-        # Заменяем запятые на точки и приводим к float
+        # Числа с десятичной запятой; числовые ячейки берутся как есть, без преобразования в строки
         for col in ["checks", "avg_check", "total_sales"]:
-            self.df[col] = self.df[col].astype(str).str.replace(",", ".").astype(float)
+            df[col] = parse_numbers(df[col], decimal=",")
 
         # Добавляем столбцы "Год", "Месяц", "Номер месяца"
-        self.df["year"] = self.df["date"].dt.year
-        self.df["month"] = self.df["date"].dt.month
-        self.df["month_number"] = (self.df["year"] - self.df["year"].min()) * 12 + self.df["month"]
+        df["year"] = df["date"].dt.year
+        df["month"] = df["date"].dt.month
+        df["month_number"] = (df["year"] - df["year"].min()) * 12 + df["month"]
 
-        print("Данные успешно обработаны!")
-        return self.df
+        return df
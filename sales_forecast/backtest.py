@@ -0,0 +1,268 @@
+# sales_forecast/backtest.py
+"""
+Оценка точности прогноза методом скользящего начала (rolling origin).
+
+Для каждой даты отсечения cutoff прогноз строится только по истории до cutoff
+(BatchForecaster, все магазины одной пачкой) на horizon дней вперед и сравнивается
+с фактом. Ошибки суммируются по магазину и корзине горизонта (1-7, 8-30, ... дней
+вперед), из сумм считаются MAPE, WAPE и смещение (bias).
+
+Даты отсечения считаются параллельно в процессах; история один раз сохраняется
+в .npy и открывается исполнителями через memory map, а не пересылается каждому
+процессу через pickle. Сезонные профили всех дат отсечения строятся за один проход
+по истории (cutoff_profiles) и могут переиспользоваться при подборе параметров.
+"""
+
+import tempfile
+from functools import partial
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from sales_forecast.batch import BatchForecaster
+from sales_forecast.data_loader import COLUMN_RENAMES
+from sales_forecast.parallel import run_parallel
+from sales_forecast.seasonal import SeasonalProfile
+
+# Верхние границы корзин горизонта прогноза, дней вперед
+HORIZON_BUCKETS = (7, 30, 90, 365)
+
+# Показатель истории -> столбец прогноза BatchForecaster
+TARGET_COLUMNS = {
+    "checks": "Количество чеков",
+    "avg_check": "Средняя сумма чека",
+    "total_sales": "Общая сумма продаж",
+}
+
+# Суммы, из которых собираются метрики (складываются по датам отсечения, магазинам и корзинам)
+SUM_COLUMNS = ["n", "abs_error", "abs_actual", "error", "actual", "ape", "n_ape"]
+
+_HISTORY_ARRAYS = ["codes", "days", "checks", "avg_check", "total_sales"]
+
+
+def rolling_cutoffs(df, horizon=365, n_cutoffs=12, step_days=30, min_history_days=365):
+    """
+    Даты отсечения с шагом step_days, последняя - так, чтобы весь горизонт был в истории.
+
+    Returns:
+        list[pd.Timestamp]: Даты по возрастанию; отсечения, до которых меньше min_history_days
+        истории, отбрасываются.
+    """
+    dates = pd.to_datetime(df.rename(columns=COLUMN_RENAMES)["date"])
+    first, last = dates.min().normalize(), dates.max().normalize()
+    latest = last - pd.Timedelta(days=horizon - 1)
+    cutoffs = [latest - pd.Timedelta(days=step_days * i) for i in range(n_cutoffs)]
+    earliest = first + pd.Timedelta(days=min_history_days)
+    return sorted(cutoff for cutoff in cutoffs if cutoff >= earliest)
+
+
+def cutoff_profiles(df, cutoffs, store_column="store_id"):
+    """
+    Сезонные профили магазинов по истории до каждой даты отсечения.
+
+    Профили накапливаются за один проход по истории, упорядоченной по дате: профиль следующей
+    даты отсечения - копия предыдущего плюс строки между ними.
+
+    Returns:
+        list[SeasonalProfile]: Профили многих рядов (ряды - все магазины df) в порядке cutoffs.
+    """
+    df = df.rename(columns=COLUMN_RENAMES)
+    if store_column not in df.columns:
+        df = df.assign(**{store_column: "all"})
+    df = df.sort_values("date", kind="stable")
+    dates = df["date"].to_numpy(dtype="datetime64[D]")
+    profile = SeasonalProfile(np.sort(pd.unique(df[store_column])))
+    profiles = {}
+    n_done = 0
+    for cutoff in sorted({pd.Timestamp(cutoff) for cutoff in cutoffs}):
+        n_train = int(np.searchsorted(dates, np.datetime64(cutoff, "D"), side="left"))
+        profile.update(df.iloc[n_done:n_train], store_column)
+        n_done = n_train
+        profiles[cutoff] = SeasonalProfile.from_arrays(profile.to_arrays())
+    return [profiles[pd.Timestamp(cutoff)] for cutoff in cutoffs]
+
+
+def backtest(df, cutoffs, horizon=365, store_column="store_id", target="total_sales", buckets=HORIZON_BUCKETS,
+             workers=None, profiles=None, **forecast_params):
+    """
+    Прогноз от каждой даты отсечения и суммы ошибок по магазинам и корзинам горизонта.
+
+    Args:
+        df (pd.DataFrame): История ('date', 'checks', 'avg_check', 'total_sales' или заголовки выгрузки);
+            без store_column считается одним магазином.
+        cutoffs: Даты отсечения (первый день прогноза), например из rolling_cutoffs.
+        horizon (int): Длина прогноза в днях.
+        store_column (str): Столбец магазина.
+        target (str): Оцениваемый показатель: 'total_sales', 'checks' или 'avg_check'.
+        buckets: Верхние границы корзин горизонта в днях.
+        workers (int): Число процессов, как в parallel.run_parallel.
+        profiles: Профили дат отсечения из cutoff_profiles (для повторных запусков с другими
+            параметрами); по умолчанию строятся здесь.
+        **forecast_params: min_avg_check, max_avg_check, floor_factor, model, granularity
+            для BatchForecaster.forecast.
+
+    Returns:
+        tuple: (таблица сумм ошибок: store_column, 'bucket', 'cutoff' и SUM_COLUMNS;
+        список TaskResult с ошибками по датам отсечения). Метрики - accuracy_report(таблица).
+
+    Raises:
+        ValueError: Если target не поддерживается или horizon не положительный.
+    """
+    if target not in TARGET_COLUMNS:
+        raise ValueError(f"Неизвестный показатель: {target}")
+    if horizon < 1:
+        raise ValueError("Горизонт прогноза должен быть положительным")
+
+    df = df.rename(columns=COLUMN_RENAMES)
+    if store_column not in df.columns:
+        df = df.assign(**{store_column: "all"})
+    edges, labels = _bucket_edges(buckets, horizon)
+    cutoffs = [pd.Timestamp(cutoff) for cutoff in cutoffs]
+
+    if profiles is None:
+        profiles = cutoff_profiles(df, cutoffs, store_column)
+
+    with tempfile.TemporaryDirectory(prefix="sales_forecast_backtest_") as history_dir:
+        stores = _share_history(df, store_column, history_dir)
+        # Профили - по файлу на дату отсечения, ряды профиля переводятся в коды магазинов истории
+        for i, profile in enumerate(profiles):
+            arrays = profile.take(stores).to_arrays()
+            arrays["stores"] = np.arange(len(stores))
+            np.savez(Path(history_dir) / f"profile_{i}.npz", **arrays)
+        task = partial(
+            _backtest_cutoff, history_dir=history_dir, horizon=horizon, target=target, edges=edges,
+            forecast_params=forecast_params
+        )
+        results = run_parallel(task, list(enumerate(cutoffs)), workers=workers, keys=cutoffs)
+
+    frames = []
+    for result in results:
+        if result.ok:
+            frame = result.value
+            frame.insert(0, "cutoff", result.key)
+            frames.append(frame)
+    failures = [result for result in results if not result.ok]
+
+    columns = [store_column, "bucket", "cutoff"] + SUM_COLUMNS
+    if not frames:
+        return pd.DataFrame(columns=columns), failures
+    errors = pd.concat(frames, ignore_index=True)
+    errors[store_column] = np.asarray(stores, dtype=object)[errors.pop("code").to_numpy()]
+    errors["bucket"] = pd.Categorical.from_codes(errors["bucket"].to_numpy(), categories=labels, ordered=True)
+    return errors[columns], failures
+
+
+def accuracy_report(errors, by=("store_id", "bucket")):
+    """
+    MAPE, WAPE и смещение (в процентах) по сумме ошибок backtest.
+
+    Args:
+        errors (pd.DataFrame): Первый элемент результата backtest.
+        by: Столбцы группировки; пустой список - одна строка по всем данным.
+
+    Returns:
+        pd.DataFrame: Колонки by, 'n' (дней прогноза), 'mape', 'wape', 'bias'. mape считается по дням
+        с ненулевым фактом; bias > 0 - прогноз завышен.
+    """
+    by = list(by)
+    if by:
+        sums = errors.groupby(by, sort=True, observed=True)[SUM_COLUMNS].sum()
+    else:
+        sums = errors[SUM_COLUMNS].sum().to_frame().T
+    with np.errstate(invalid="ignore", divide="ignore"):
+        report = pd.DataFrame({
+            "n": sums["n"].astype(np.int64),
+            "mape": 100 * sums["ape"] / sums["n_ape"],
+            "wape": 100 * sums["abs_error"] / sums["abs_actual"],
+            "bias": 100 * sums["error"] / sums["actual"],
+        }, index=sums.index)
+    return report.reset_index() if by else report.reset_index(drop=True)
+
+
+def _bucket_edges(buckets, horizon):
+    # Корзины, начинающиеся за горизонтом, не нужны; хвост горизонта за последней границей - отдельная корзина
+    edges = [edge for edge in sorted(buckets) if edge < horizon] + [horizon]
+    labels = []
+    lower = 1
+    for edge in edges:
+        labels.append(f"{lower}-{edge}")
+        lower = edge + 1
+    return np.array(edges), labels
+
+
+def _share_history(df, store_column, history_dir):
+    """Сохраняет историю, упорядоченную по дате, в .npy для чтения исполнителями через memory map."""
+    codes, stores = pd.factorize(df[store_column], sort=True)
+    days = df["date"].to_numpy(dtype="datetime64[D]").astype(np.int64)
+    order = np.argsort(days, kind="stable")
+    arrays = {
+        "codes": codes.astype(np.int32),
+        "days": days,
+        "checks": df["checks"].to_numpy(dtype=float),
+        "avg_check": df["avg_check"].to_numpy(dtype=float),
+        "total_sales": df["total_sales"].to_numpy(dtype=float),
+    }
+    for name, values in arrays.items():
+        np.save(Path(history_dir) / f"{name}.npy", values[order])
+    return list(stores)
+
+
+def _backtest_cutoff(task, history_dir, horizon, target, edges, forecast_params):
+    # Выполняется в процессе-исполнителе: история открывается через memory map без копирования
+    index, cutoff = task
+    history = {name: np.load(Path(history_dir) / f"{name}.npy", mmap_mode="r") for name in _HISTORY_ARRAYS}
+    profile = SeasonalProfile.load(Path(history_dir) / f"profile_{index}.npz")
+    days = history["days"]
+    first_day = int(np.datetime64(pd.Timestamp(cutoff), "D").astype(np.int64))
+    n_train = int(np.searchsorted(days, first_day, side="left"))
+    n_end = int(np.searchsorted(days, first_day + horizon, side="left"))
+    if n_train == 0:
+        raise ValueError(f"Нет истории до {pd.Timestamp(cutoff).date()}")
+
+    # Копируется только срез обучения этой даты отсечения; магазин передается кодом
+    train = pd.DataFrame({
+        "code": history["codes"][:n_train],
+        "date": days[:n_train].astype("datetime64[D]").astype("datetime64[s]"),
+        "checks": history["checks"][:n_train],
+        "avg_check": history["avg_check"][:n_train],
+        "total_sales": history["total_sales"][:n_train],
+    })
+    start_date = pd.Timestamp(cutoff)
+    end_date = start_date + pd.Timedelta(days=horizon - 1)
+    forecast_df = BatchForecaster(train, store_column="code").forecast(
+        start_date, end_date, profile=profile, **forecast_params
+    )
+    forecast_codes = forecast_df["code"].to_numpy()[::horizon]
+    forecast = forecast_df[TARGET_COLUMNS[target]].to_numpy(dtype=float).reshape(len(forecast_codes), horizon)
+
+    # Факт за горизонт: магазины без истории до cutoff не оцениваются
+    actual_codes = np.asarray(history["codes"][n_train:n_end])
+    offsets = np.asarray(days[n_train:n_end]) - first_day
+    actual = np.asarray(history[target][n_train:n_end], dtype=float)
+    rows = np.searchsorted(forecast_codes, actual_codes)
+    known = (rows < len(forecast_codes)) & (forecast_codes[np.minimum(rows, len(forecast_codes) - 1)] == actual_codes)
+    predicted = np.full(len(actual), np.nan)
+    predicted[known] = forecast[rows[known], offsets[known]]
+    valid = known & ~np.isnan(actual) & ~np.isnan(predicted)
+
+    codes = actual_codes[valid]
+    bucket = np.searchsorted(edges, offsets[valid] + 1, side="left")
+    actual = actual[valid]
+    error = predicted[valid] - actual
+    nonzero = actual != 0
+    ape = np.zeros(len(actual))
+    ape[nonzero] = np.abs(error[nonzero]) / np.abs(actual[nonzero])
+
+    sums = pd.DataFrame({
+        "code": codes,
+        "bucket": bucket,
+        "n": 1,
+        "abs_error": np.abs(error),
+        "abs_actual": np.abs(actual),
+        "error": error,
+        "actual": actual,
+        "ape": ape,
+        "n_ape": nonzero.astype(np.int64),
+    })
+    return sums.groupby(["code", "bucket"], sort=True).sum().reset_index()
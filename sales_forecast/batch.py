@@ -0,0 +1,236 @@
+# sales_forecast/batch.py
+
+import logging
+
+import numpy as np
+import pandas as pd
+from sales_forecast.aggregator import build_rollups
+from sales_forecast.data_loader import COLUMN_RENAMES
+from sales_forecast.forecast import MIN_AVG_CHECK, MAX_AVG_CHECK
+from sales_forecast.instrumentation import no_checkpoint
+from sales_forecast.seasonal import FLOOR_FACTOR, SeasonalProfile
+from sales_forecast.models import DEFAULT_MODEL, fit_each, get_model
+
+logger = logging.getLogger(__name__)
+
+# Гранулярность обучения тренда: по дням или по месячным сверткам
+GRANULARITIES = ("daily", "monthly")
+
+
+class BatchForecaster:
+    """
+    Прогноз сразу для многих рядов (магазинов / SKU) по длинной таблице с колонкой store_id.
+
+    Повторяет логику SalesForecaster.forecast, но тренды всех рядов (для моделей с supports_batch,
+    см. models) решаются одной пачкой нормальных уравнений в NumPy, а корректировки применяются
+    массивами формы (магазины x дни) без цикла по рядам.
+    """
+
+    def __init__(self, data, store_column="store_id"):
+        # Преобразуем заголовки данных для соответствия коду
+        data = data.rename(columns=COLUMN_RENAMES)
+        self.store_column = store_column
+        self.df = data
+        self.forecast_df = None
+        self.model = None
+        self.profile = None
+
+    def forecast(self, start_date="2025-01-01", end_date="2025-12-31", checkpoint=None,
+                 min_avg_check=MIN_AVG_CHECK, max_avg_check=MAX_AVG_CHECK, floor_factor=FLOOR_FACTOR,
+                 model=DEFAULT_MODEL, granularity="daily", profile=None):
+        """
+        Прогноз всех магазинов на период [start_date, end_date].
+
+        checkpoint(название_этапа) вызывается между этапами, как в SalesForecaster.forecast.
+        min_avg_check, max_avg_check и floor_factor - как в SalesForecaster.forecast
+        (подбираются по результатам backtest).
+        model - модель тренда, как в SalesForecaster.forecast; в self.model сохраняется обученная
+        модель, а для моделей без supports_batch - список моделей по магазинам.
+        granularity="monthly" - тренд обучается на месячных свертках (aggregator.build_rollups:
+        среднее число чеков в день и средний чек месяца), а прогноз по дням получается из тренда
+        с поправкой на день недели по истории магазина; корректировки те же, что при "daily".
+        profile (seasonal.SeasonalProfile) - готовый профиль многих рядов
+        (SeasonalProfile.from_history(..., store_column)), в котором есть все магазины таблицы;
+        по умолчанию строится по self.df при первом прогнозе и запоминается в self.profile.
+
+        Raises:
+            ValueError: Если granularity неизвестна или модель не подходит для месячного обучения.
+        """
+        if checkpoint is None:
+            checkpoint = no_checkpoint
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Неизвестная гранулярность обучения: {granularity}")
+        if granularity == "monthly" and get_model(model).name == "weekly":
+            raise ValueError("Модель weekly не обучается на месячных свертках: день недели учитывается при разбиении")
+
+        if self.df is None or self.df.empty:
+            logger.error("Ошибка: self.df пустой!")
+            return None
+
+        df = self.df
+        codes, stores = pd.factorize(df[self.store_column], sort=True)
+        n_stores = len(stores)
+
+        dates = df["date"].to_numpy(dtype="datetime64[D]")
+        checks = df["checks"].to_numpy(dtype=float)
+        avg_check = df["avg_check"].to_numpy(dtype=float)
+        total_sales = df["total_sales"].to_numpy(dtype=float)
+
+        # Номер дня от начала данных каждого магазина
+        origin = np.full(n_stores, np.datetime64("9999-12-31", "D"))
+        np.minimum.at(origin, codes, dates)
+        day_number = (dates - origin[codes]).astype(np.int64) + 1
+
+        checkpoint("Отсечение выбросов")
+
+        # Убираем выбросы в avg_check по каждому магазину (с жестким диапазоном min_avg_check..max_avg_check)
+        quartiles = pd.Series(avg_check).groupby(codes).quantile([0.25, 0.75]).unstack()
+        q1 = quartiles[0.25].to_numpy()
+        q3 = quartiles[0.75].to_numpy()
+        iqr = q3 - q1
+        lower_bound = np.maximum(q1 - 1.5 * iqr, min_avg_check)
+        upper_bound = np.minimum(q3 + 1.5 * iqr, max_avg_check)
+        inliers = (avg_check >= lower_bound[codes]) & (avg_check <= upper_bound[codes])
+
+        checkpoint("Обучение модели")
+
+        # Модели с supports_batch учат checks и avg_check всех магазинов одним решением,
+        # остальные - по одному магазину
+        model = get_model(model)
+        if granularity == "monthly":
+            # Обучение на месячных свертках: десятки точек на магазин вместо сотен дней
+            day_number, targets, fit_codes, weekday_factors = _monthly_training(
+                codes, dates, checks, avg_check, total_sales, inliers, origin, n_stores
+            )
+        else:
+            day_number = day_number[inliers]
+            targets = np.column_stack([checks[inliers], avg_check[inliers]])
+            fit_codes = codes[inliers]
+        if model.supports_batch:
+            self.model = model.fit(day_number, targets, fit_codes, n_stores, origin=origin)
+        else:
+            self.model = fit_each(model, day_number, targets, fit_codes, n_stores, origin)
+
+        checkpoint("Прогноз тренда")
+
+        forecast_days = pd.date_range(start=start_date, end=end_date)
+        horizon = forecast_days.to_numpy(dtype="datetime64[D]")
+        forecast_day_numbers = (horizon[None, :] - origin[:, None]).astype(np.int64) + 1
+        if model.supports_batch:
+            prediction = model.predict(forecast_day_numbers)
+        else:
+            # Магазин без строк после отсечения выбросов получает нулевой тренд, как вырожденный ряд в пачке
+            prediction = np.stack([
+                np.zeros((len(forecast_days), 2)) if fitted is None else fitted.predict(day_numbers)
+                for fitted, day_numbers in zip(self.model, forecast_day_numbers)
+            ])
+        if granularity == "monthly":
+            # Разбиение по дням: тренд месячного уровня на день прогноза * доля дня недели магазина
+            prediction = prediction * weekday_factors[:, _weekday(horizon), :]
+        forecast_checks = prediction[..., 0]
+        forecast_avg_check = prediction[..., 1]
+
+        checkpoint("Корректировка по истории")
+
+        # Сезонный профиль всех магазинов строится один раз: повторный прогноз (другие параметры,
+        # общий профиль из backtest) обходится без группировок по истории
+        if profile is not None:
+            self.profile = profile
+        elif self.profile is None:
+            self.profile = SeasonalProfile.from_history(df, store_column=self.store_column)
+        profile = self.profile
+        if not np.array_equal(profile.stores, np.asarray(stores)):
+            profile = profile.take(stores)
+
+        # Корректировка: прогноз не ниже исторического максимума по дню года * floor_factor
+        floor = profile.floor(forecast_days, factor=floor_factor)
+        forecast_checks = np.fmax(np.round(forecast_checks), floor[..., 0])
+        forecast_avg_check = np.fmax(forecast_avg_check, floor[..., 1])
+
+        checkpoint("Корректировка 15-го числа")
+
+        # Корректировка 15-го числа: средние значения за 15-е число того же месяца прошлого года
+        # (опорный год - свой у каждого дня прогноза)
+        is_15th = forecast_days.day == 15
+
+        if is_15th.any():
+            # Для месяцев без данных - среднее прогноза магазина
+            values = profile.last_year_fifteenth_means(
+                forecast_days[is_15th],
+                fallback=np.column_stack([forecast_checks.mean(axis=1), forecast_avg_check.mean(axis=1)])
+            )
+            valid = ~np.isnan(values).any(axis=-1)
+            block_checks = forecast_checks[:, is_15th]
+            block_avg_check = forecast_avg_check[:, is_15th]
+            block_checks[valid] = np.round(values[..., 0][valid])
+            block_avg_check[valid] = values[..., 1][valid]
+            forecast_checks[:, is_15th] = block_checks
+            forecast_avg_check[:, is_15th] = block_avg_check
+
+        forecast_checks = np.round(forecast_checks).astype(int)
+        forecast_sales = forecast_checks * forecast_avg_check
+
+        # Корректировка суммы продаж 15-го числа: прибавляем удвоенную сумму продаж за 15-е число прошлого года
+        if is_15th.any():
+            adjustment = profile.last_year_fifteenth_sums(forecast_days[is_15th]) * 2
+            adjustment[~(adjustment > 0)] = 0
+            forecast_sales[:, is_15th] += adjustment
+
+        checkpoint("Сборка таблицы")
+
+        n_days = len(forecast_days)
+        self.forecast_df = pd.DataFrame({
+            self.store_column: np.repeat(stores, n_days),
+            "Дата": np.tile(forecast_days.strftime("%Y-%m-%d"), n_stores),
+            "Количество чеков": forecast_checks.ravel(),
+            "Средняя сумма чека": forecast_avg_check.ravel(),
+            "Общая сумма продаж": forecast_sales.ravel()
+        })
+        return self.forecast_df
+
+
+def _weekday(days):
+    # День недели (понедельник = 0) для datetime64[D]; 1970-01-01 - четверг
+    return (days.astype(np.int64) + 3) % 7
+
+
+def _monthly_training(codes, dates, checks, avg_check, total_sales, inliers, origin, n_stores):
+    """
+    Обучающие точки по месячным сверткам и поправки дня недели по строкам без выбросов.
+
+    Returns:
+        tuple: (номера дней середины месяцев, показатели (checks в день, avg_check месяца),
+        коды магазинов, поправки дня недели формы (n_stores, 7, 2) со средним 1 по неделе).
+    """
+    history = pd.DataFrame({
+        "code": codes[inliers],
+        "date": dates[inliers],
+        "checks": checks[inliers],
+        "total_sales": total_sales[inliers],
+    })
+    monthly = build_rollups(history, store_column="code", levels=["monthly"])["monthly"]
+    month_codes = monthly["code"].to_numpy()
+    month_start = monthly["period"].to_numpy(dtype="datetime64[D]")
+    month_length = (month_start.astype("datetime64[M]") + 1).astype("datetime64[D]") - month_start
+    # Точка месяца - середина календарного месяца от начала данных магазина
+    month_day_number = (
+        (month_start - origin[month_codes]).astype(np.int64) + 1 + (month_length.astype(np.int64) - 1) / 2
+    )
+    targets = np.column_stack([
+        monthly["checks"].to_numpy() / monthly["days"].to_numpy(),
+        monthly["avg_check"].to_numpy(),
+    ])
+
+    # Средние по (магазин, день недели), деленные на среднее по дням недели магазина
+    flat_index = codes[inliers] * 7 + _weekday(dates[inliers])
+    counts = np.bincount(flat_index, minlength=n_stores * 7).reshape(n_stores, 7)
+    seen = counts > 0
+    factors = np.empty((n_stores, 7, 2))
+    for j, values in enumerate([checks[inliers], avg_check[inliers]]):
+        sums = np.bincount(flat_index, weights=np.nan_to_num(values), minlength=n_stores * 7).reshape(n_stores, 7)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = np.where(seen, sums / counts, 0.0)
+            factors[..., j] = means / (means.sum(axis=1, keepdims=True) / seen.sum(axis=1, keepdims=True))
+    # Дни недели без данных (и магазины без строк) - без поправки
+    factors[~(seen[..., None] & np.isfinite(factors))] = 1.0
+    return month_day_number, targets, month_codes, factors
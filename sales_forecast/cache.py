@@ -0,0 +1,221 @@
+# sales_forecast/cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Версия формата хранения кэша; при изменении старые записи просто перестают находиться
+CACHE_FORMAT_VERSION = 1
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def _feather():
+    # pyarrow импортируется лениво: он тяжелый и нужен только при чтении/записи кэша
+    try:
+        import pyarrow.feather as feather
+    except ImportError:  # pyarrow не установлен - используем memory-mapped .npy
+        return None
+    return feather
+
+
+def default_cache_dir():
+    return Path(os.environ.get("SALES_FORECAST_CACHE_DIR", Path.home() / ".cache" / "sales_forecast"))
+
+
+def file_digest(file_path):
+    """
+    SHA-256 содержимого файла (читается блоками по 1 МБ).
+
+    Хеш запоминается по (путь, mtime, размер): повторные вызовы для неизмененного файла
+    (например, несколько записей кэша одного файла) не читают его заново.
+    """
+    stat = os.stat(file_path)
+    return _file_digest(os.path.abspath(file_path), stat.st_mtime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=1024)
+def _file_digest(file_path, mtime_ns, size):
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class FrameCache:
+    """
+    Кэш разобранных и очищенных таблиц по хешу содержимого исходного файла.
+
+    Ключ записи - SHA-256 файла + имя загрузчика + версия его схемы, поэтому переименование
+    или копирование файла не мешает попаданию, а изменение содержимого или логики очистки
+    дает промах. Таблица хранится по столбцам: Feather, если установлен pyarrow, иначе
+    отдельные .npy, которые открываются через memory-map. Индекс таблицы не сохраняется.
+    Размер кэша ограничен max_bytes, лишние записи удаляются по давности использования (LRU).
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else default_cache_dir()
+        self.max_bytes = max_bytes
+
+    def key(self, file_path, namespace, version=1):
+        return f"{namespace}-v{version}-f{CACHE_FORMAT_VERSION}-{file_digest(file_path)}"
+
+    def get_or_load(self, file_path, loader, namespace, version=1):
+        """
+        Возвращает таблицу из кэша или вызывает loader(file_path) и сохраняет результат.
+
+        Args:
+            file_path: Путь к исходному файлу.
+            loader: Функция разбора файла, возвращающая pd.DataFrame.
+            namespace (str): Имя загрузчика (разные загрузчики одного файла не пересекаются).
+            version (int): Версия схемы загрузчика; увеличивается при изменении логики очистки.
+        """
+        key = self.key(file_path, namespace, version)
+        df = self._read(key)
+        if df is None:
+            df = loader(file_path)
+            self._write(key, df)
+            self._evict()
+        return df
+
+    def invalidate(self, file_path=None, namespace=None):
+        """
+        Удаляет записи кэша: для конкретного файла и/или загрузчика; без аргументов - все записи.
+
+        Returns:
+            int: Число удаленных записей.
+        """
+        digest = file_digest(file_path) if file_path is not None else None
+        removed = 0
+        for entry in self._entries():
+            name = entry.name
+            if digest is not None and not name.endswith(digest):
+                continue
+            if namespace is not None and not name.startswith(f"{namespace}-v"):
+                continue
+            shutil.rmtree(entry, ignore_errors=True)
+            removed += 1
+        return removed
+
+    def clear(self):
+        return self.invalidate()
+
+    def size(self):
+        return sum(_entry_size(entry) for entry in self._entries())
+
+    def _entries(self):
+        if not self.cache_dir.is_dir():
+            return []
+        return [entry for entry in self.cache_dir.iterdir() if (entry / "meta.json").is_file()]
+
+    def _read(self, key):
+        entry = self.cache_dir / key
+        meta_path = entry / "meta.json"
+        if not meta_path.is_file():
+            return None
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        # Отмечаем использование для LRU
+        os.utime(meta_path)
+
+        if meta["format"] == "feather":
+            feather = _feather()
+            if feather is None:
+                # Запись сделана с pyarrow, а сейчас он не установлен: промах, файл разбирается
+                # заново, и запись перезаписывается в .npy
+                shutil.rmtree(entry, ignore_errors=True)
+                return None
+            return feather.read_feather(entry / "frame.feather", memory_map=True)
+
+        columns = {}
+        for i, column in enumerate(meta["columns"]):
+            kind = column["kind"]
+            path = entry / f"{i}.npy"
+            if kind == "array":
+                columns[column["name"]] = np.load(path, mmap_mode="r")
+            elif kind == "category":
+                codes = np.load(path, mmap_mode="r")
+                columns[column["name"]] = pd.Categorical.from_codes(codes, categories=column["categories"])
+            else:
+                columns[column["name"]] = pd.Series(np.load(path, allow_pickle=True), dtype=column["dtype"])
+        return pd.DataFrame(columns, columns=[column["name"] for column in meta["columns"]])
+
+    def _write(self, key, df):
+        """
+        Записывает таблицу во временный каталог и публикует его под именем key.
+
+        Ключ определяется содержимым файла, поэтому одновременные записи одного ключа равноценны:
+        если запись уже опубликована другим процессом или потоком, она остается, а своя копия удаляется.
+        """
+        entry = self.cache_dir / key
+        # Свой временный каталог у каждого процесса и потока
+        tmp = self.cache_dir / f".{key}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        try:
+            self._write_files(tmp, df)
+            if not (entry / "meta.json").is_file():
+                # Недописанный каталог прежней записи (без meta.json) мешает переименованию
+                shutil.rmtree(entry, ignore_errors=True)
+                os.replace(tmp, entry)
+        except OSError:
+            # Запись опубликовал другой писатель между проверкой и переименованием
+            if not (entry / "meta.json").is_file():
+                raise
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    @staticmethod
+    def _write_files(tmp, df):
+        meta = {"format": "npy", "columns": [], "created": time.time()}
+        df = df.reset_index(drop=True)
+
+        feather = _feather()
+        if feather is not None:
+            try:
+                feather.write_feather(df, tmp / "frame.feather", compression="uncompressed")
+                meta["format"] = "feather"
+            except Exception:
+                # Смешанные типы в столбцах Feather не поддерживает - сохраняем в .npy
+                (tmp / "frame.feather").unlink(missing_ok=True)
+
+        if meta["format"] == "npy":
+            for i, name in enumerate(df.columns):
+                series = df[name]
+                if isinstance(series.dtype, pd.CategoricalDtype):
+                    np.save(tmp / f"{i}.npy", series.cat.codes.to_numpy())
+                    column = {"kind": "category", "categories": series.cat.categories.tolist()}
+                elif series.dtype.kind in "biufcmM":
+                    np.save(tmp / f"{i}.npy", series.to_numpy())
+                    column = {"kind": "array"}
+                else:
+                    np.save(tmp / f"{i}.npy", series.to_numpy(dtype=object), allow_pickle=True)
+                    column = {"kind": "object", "dtype": str(series.dtype)}
+                column["name"] = name
+                meta["columns"].append(column)
+
+        with open(tmp / "meta.json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda entry: (entry / "meta.json").stat().st_mtime)
+        sizes = {entry: _entry_size(entry) for entry in entries}
+        total = sum(sizes.values())
+        # Самую свежую запись не удаляем, даже если она одна больше лимита
+        for entry in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= sizes[entry]
+
+
+def _entry_size(entry):
+    return sum(path.stat().st_size for path in entry.iterdir() if path.is_file())
@@ -0,0 +1,177 @@
+# sales_forecast/cli.py
+"""
+Пакетный запуск прогноза без GUI: python -m sales_forecast ВХОДЫ... [параметры]
+
+Для каждого входного Excel-файла выполняется загрузка -> прогноз -> корректировки -> выгрузка
+в OUTPUT_DIR/<имя файла>_forecast.<формат>. Tk и окна matplotlib не используются.
+Файл со столбцом store_id прогнозируется по магазинам (BatchForecaster), store_id
+сохраняется в выгрузке. --granularity monthly обучает тренд на месячных свертках
+(тоже через BatchForecaster).
+
+Замеры этапов (время, строки, память) сохраняются через --metrics-json, отладочный вывод
+включается через --log-level DEBUG, профиль одного запуска - через --profile.
+"""
+
+import argparse
+import glob
+import json
+import logging
+import sys
+from functools import partial
+from pathlib import Path
+
+import pandas as pd
+
+from sales_forecast.batch import GRANULARITIES, BatchForecaster
+from sales_forecast.cache import FrameCache
+from sales_forecast.data_loader import read_sales_excel
+from sales_forecast.excel_exporter import ExcelExporter
+from sales_forecast.forecast import SalesForecaster
+from sales_forecast.instrumentation import RunMetrics, profiled, stage
+from sales_forecast.models import DEFAULT_MODEL, MODELS
+from sales_forecast.parallel import run_parallel
+from sales_forecast.plotting import plot_forecast
+
+logger = logging.getLogger(__name__)
+
+# Столбец магазина во входном файле (см. data_loader.read_sales_excel)
+STORE_COLUMN = "store_id"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m sales_forecast", description="Прогноз продаж по дням без GUI.")
+    parser.add_argument("inputs", nargs="+", help="Excel-файлы или маски (например, exports/*.xlsx)")
+    parser.add_argument("-o", "--output-dir", default="forecasts", help="Каталог для результатов (по умолчанию ./forecasts)")
+    parser.add_argument("--format", choices=["xlsx", "csv", "parquet"], default="xlsx", help="Формат выгрузки")
+    parser.add_argument("--start", help="Первый день прогноза (YYYY-MM-DD); по умолчанию - следующий день после истории")
+    parser.add_argument("--horizon", type=int, default=365, help="Длина прогноза в днях (по умолчанию 365)")
+    parser.add_argument("--plot", action="store_true", help="Сохранить график рядом с прогнозом (<имя>_forecast.png)")
+    parser.add_argument("--workers", type=int, default=1, help="Число процессов (0 - по числу ядер)")
+    parser.add_argument("--cache-dir", help="Каталог кэша разобранных файлов")
+    parser.add_argument("--no-cache", action="store_true", help="Не использовать кэш разобранных файлов")
+    parser.add_argument("--compact", action="store_true",
+                        help="Хранить историю в компактных типах (int32/float32): меньше памяти, точность float32")
+    parser.add_argument("--model", choices=sorted(MODELS), default=DEFAULT_MODEL,
+                        help="Модель тренда (по умолчанию poly - полином 2-й степени в NumPy)")
+    parser.add_argument("--granularity", choices=GRANULARITIES, default="daily",
+                        help="Обучение тренда по дням или по месячным сверткам (monthly быстрее на длинной истории)")
+    parser.add_argument("--intervals", type=int, default=0, metavar="B",
+                        help="Добавить столбцы P10/P50/P90 по B повторам бутстрэпа (например, 1000)")
+    parser.add_argument("--seed", type=int, help="Зерно генератора для --intervals")
+    parser.add_argument("--metrics-json", help="Сохранить замеры этапов по каждому файлу в JSON")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="Замерять пиковую память этапов (tracemalloc, замедляет расчет)")
+    parser.add_argument("--log-level", default="WARNING", choices=["DEBUG", "INFO", "WARNING", "ERROR"],
+                        help="Уровень журнала (DEBUG - отладочный вывод этапов)")
+    parser.add_argument("--profile", help="Профилировать запуск и сохранить результат в файл (расчет в одном процессе)")
+    parser.add_argument("--profiler", choices=["cprofile", "pyinstrument"], default="cprofile",
+                        help="Профилировщик для --profile")
+    return parser
+
+
+def expand_inputs(patterns):
+    paths = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern))
+        paths.extend(matches if matches else [pattern])
+    # Убираем повторы, сохраняя порядок
+    return list(dict.fromkeys(paths))
+
+
+def run_file(file_path, output_dir, fmt, start, horizon, plot, cache_dir, use_cache, trace_memory=False,
+             compact=False, n_boot=0, seed=None, model=DEFAULT_MODEL, granularity="daily"):
+    """
+    Прогноз одного файла.
+
+    Файл со столбцом STORE_COLUMN и прогноз с granularity="monthly" считаются через BatchForecaster
+    (магазины - одной пачкой).
+
+    Returns:
+        tuple: (путь к результату, замеры этапов RunMetrics.to_dict()).
+
+    Raises:
+        ValueError: Если прогноз не построен или интервалы запрошены для файла с магазинами
+            или месячного обучения.
+    """
+    metrics = RunMetrics(trace_memory=trace_memory)
+    cache = FrameCache(cache_dir) if use_cache else None
+    df = read_sales_excel(file_path, cache=cache, metrics=metrics, compact=compact)
+
+    start_date = pd.Timestamp(start) if start else df["date"].max() + pd.Timedelta(days=1)
+    end_date = start_date + pd.Timedelta(days=horizon - 1)
+    by_store = STORE_COLUMN in df.columns
+    if by_store or granularity != "daily":
+        # Несколько магазинов в одном файле: ряды не смешиваются, store_id остается в выгрузке
+        if n_boot:
+            raise ValueError(
+                f"Интервалы прогноза (--intervals) не поддерживаются для файла со столбцом {STORE_COLUMN} "
+                "и для месячного обучения"
+            )
+        forecaster = BatchForecaster(df if by_store else df.assign(**{STORE_COLUMN: 0}), store_column=STORE_COLUMN)
+        with stage(metrics, "forecast", rows_in=len(df)) as record:
+            forecast_df = forecaster.forecast(
+                start_date=start_date, end_date=end_date, model=model, granularity=granularity
+            )
+            record.rows_out = 0 if forecast_df is None else len(forecast_df)
+        if forecast_df is not None and not by_store:
+            forecast_df = forecast_df.drop(columns=STORE_COLUMN)
+    else:
+        forecaster = SalesForecaster(df)
+        forecast_df = forecaster.forecast(
+            start_date=start_date, end_date=end_date, plot=False, metrics=metrics, n_boot=n_boot, seed=seed,
+            model=model
+        )
+    if forecast_df is None:
+        raise ValueError("Прогноз не построен: нет данных для обучения")
+
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    output_path = output_dir / f"{Path(file_path).stem}_forecast.{fmt}"
+    with stage(metrics, "export", rows_in=len(forecast_df)) as record:
+        ExcelExporter.write(forecast_df, output_path, fmt=fmt)
+        record.rows_out = len(forecast_df)
+    if plot and by_store:
+        logger.warning("График по файлу со столбцом %s не строится: %s", STORE_COLUMN, file_path)
+    elif plot:
+        plot_forecast(forecaster.df, forecast_df, path=output_dir / f"{Path(file_path).stem}_forecast.png")
+    return str(output_path), metrics.to_dict()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.horizon < 1:
+        print("Ошибка: --horizon должен быть положительным", file=sys.stderr)
+        return 2
+    if args.intervals < 0:
+        print("Ошибка: --intervals не может быть отрицательным", file=sys.stderr)
+        return 2
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    paths = expand_inputs(args.inputs)
+    task = partial(
+        run_file, output_dir=args.output_dir, fmt=args.format, start=args.start, horizon=args.horizon,
+        plot=args.plot, cache_dir=args.cache_dir, use_cache=not args.no_cache, trace_memory=args.trace_memory,
+        compact=args.compact, n_boot=args.intervals, seed=args.seed, model=args.model, granularity=args.granularity
+    )
+    if args.profile:
+        # Профилировщик видит только свой процесс, поэтому расчет идет без процессов-исполнителей
+        with profiled(args.profile, profiler=args.profiler):
+            results = run_parallel(task, paths, workers=1)
+    else:
+        results = run_parallel(task, paths, workers=args.workers or None)
+
+    failed = 0
+    run_metrics = {}
+    for result in results:
+        if result.ok:
+            output_path, run_metrics[result.key] = result.value
+            print(f"{result.key} -> {output_path}")
+        else:
+            failed += 1
+            print(f"{result.key}: ОШИБКА\n{result.error}", file=sys.stderr)
+    print(f"Готово: {len(results) - failed} из {len(results)}")
+    if args.metrics_json:
+        with open(args.metrics_json, "w", encoding="utf-8") as f:
+            json.dump(run_metrics, f, ensure_ascii=False, indent=2)
+    return 1 if failed else 0
@@ -1,54 +1,224 @@
 # sales_forecast/data_loader.py
+import logging
+from functools import partial
+
+import numpy as np
 import pandas as pd
-from tkinter import filedialog, messagebox
+
+from sales_forecast.instrumentation import stage
+
+logger = logging.getLogger(__name__)
+
+
+# Версия схемы очищенной таблицы; увеличивать при изменении логики разбора (сбрасывает кэш)
+SCHEMA_VERSION = 1
+
+REQUIRED_COLUMNS = ["По дням", "Количество чеков", "Средняя сумма чека", "Сумма продажи"]
+
+# Заголовки выгрузки -> имена столбцов в коде
+COLUMN_RENAMES = {
+    "По дням": "date",
+    "Количество чеков": "checks",
+    "Средняя сумма чека": "avg_check",
+    "Сумма продажи": "total_sales",
+}
+
+# Типы столбцов в компактном режиме (compact=True): примерно в 4 раза меньше памяти на строку,
+# а без лишних столбцов и строковых копий - в разы меньше пикового потребления при разборе
+COMPACT_DTYPES = {
+    "date": "datetime64[s]",
+    "checks": "int32",
+    "avg_check": "float32",
+    "total_sales": "float32",
+    "day_number": "int32",
+}
+
+# Пробелы, которыми выгрузки разделяют разряды (обычный, неразрывный, узкий неразрывный)
+_SPACES = "[ \u00a0\u202f]"
+
+
+def read_sales_excel(file_path, cache=None, metrics=None, compact=False):
+    """
+    Читает дневной отчет о продажах из Excel без участия GUI.
+
+    Args:
+        file_path: Путь к Excel-файлу.
+        cache (FrameCache): Кэш разобранных файлов; None - всегда разбирать Excel заново.
+        metrics (RunMetrics): Куда записать замеры этапов load и clean; при попадании в кэш
+            записывается только load (чтение из кэша).
+        compact (bool): Читать только нужные столбцы и хранить их в компактных типах
+            (см. clean_sales_frame_compact).
+
+    Raises:
+        ValueError: Если отсутствуют нужные столбцы или даты не распознаны.
+    """
+    if cache is None:
+        return _parse_sales_excel(file_path, metrics, compact)
+
+    recorded = len(metrics.stages) if metrics is not None else 0
+    with stage(None, "load") as record:
+        df = cache.get_or_load(
+            file_path, partial(_parse_sales_excel, metrics=metrics, compact=compact),
+            namespace="daily_compact" if compact else "daily", version=SCHEMA_VERSION
+        )
+        record.rows_out = len(df)
+    if metrics is not None and len(metrics.stages) == recorded:
+        metrics.stages.append(record)
+    return df
+
+
+def _parse_sales_excel(file_path, metrics=None, compact=False):
+    with stage(metrics, "load") as record:
+        if compact:
+            # Лишние и безымянные столбцы не попадают в таблицу вовсе
+            df = pd.read_excel(
+                file_path, engine="openpyxl", usecols=lambda name: name in REQUIRED_COLUMNS or name == "store_id"
+            )
+        else:
+            df = pd.read_excel(file_path, engine="openpyxl")
+        record.rows_out = len(df)
+    with stage(metrics, "clean", rows_in=len(df)) as record:
+        df = clean_sales_frame_compact(df) if compact else clean_sales_frame(df)
+        record.rows_out = len(df)
+    return df
+
+
+def parse_numbers(values, decimal=".", thousands=None):
+    """
+    Разбирает числовой столбец выгрузки без преобразования всего столбца в строки.
+
+    Числа (int/float из Excel) берутся как есть; текстом обрабатываются только значения,
+    которые не удалось прочитать напрямую, например '1 234,50' или '12,345'.
+
+    Args:
+        values (pd.Series): Исходный столбец.
+        decimal (str): Десятичный разделитель в текстовых значениях.
+        thousands (str): Разделитель разрядов в текстовых значениях (пробелы удаляются всегда).
+
+    Returns:
+        np.ndarray: Значения float64; пустые ячейки - NaN.
+
+    Raises:
+        ValueError: Если текстовое значение не удалось разобрать как число.
+    """
+    if values.dtype.kind in "biuf":
+        return values.to_numpy(dtype=float)
+
+    result = pd.to_numeric(values, errors="coerce")
+    text_mask = result.isna() & values.notna()
+    if text_mask.any():
+        text = values[text_mask].astype(str).str.replace(_SPACES, "", regex=True)
+        if thousands:
+            text = text.str.replace(thousands, "", regex=False)
+        if decimal != ".":
+            text = text.str.replace(decimal, ".", regex=False)
+        parsed = pd.to_numeric(text, errors="coerce")
+        bad = parsed.isna() & (text != "")
+        if bad.any():
+            examples = values[text_mask][bad].head().tolist()
+            raise ValueError(f"Не удалось разобрать числа в столбце '{values.name}': {examples}")
+        result[text_mask] = parsed
+    return result.to_numpy(dtype=float)
+
+
+def clean_sales_frame(df):
+    """
+    Очищает таблицу, прочитанную из дневного отчета: проверка столбцов, даты, числа, номер дня.
+
+    Raises:
+        ValueError: Если отсутствуют нужные столбцы или даты не распознаны.
+    """
+    logger.debug("Заголовки столбцов: %s", list(df.columns))
+
+    df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Отсутствуют столбцы: {missing_columns}")
+
+    df["По дням"] = pd.to_datetime(df["По дням"], errors="coerce", dayfirst=True)
+    if df["По дням"].isna().sum() > 0:
+        logger.error("Проблемные даты:\n%s", df[df["По дням"].isna()])
+        raise ValueError("Некоторые даты не распознаны! Проверь формат.")
+
+    # Переименовываем столбцы
+    df.rename(columns=COLUMN_RENAMES, inplace=True)
+
+    # Преобразуем числа
+    df["checks"] = df["checks"].astype(str).str.replace(",", "").astype(int)
+    df["avg_check"] = df["avg_check"].astype(str).str.replace(",", ".").astype(float)
+    df["total_sales"] = df["total_sales"].astype(str).str.replace(" ", "").str.replace(",", ".").astype(float)
+
+    # Добавляем номер дня от минимальной даты
+    df["day_number"] = (df["date"] - df["date"].min()).dt.days + 1
+    return df
+
+
+def clean_sales_frame_compact(df, store_column="store_id"):
+    """
+    Очищает таблицу дневного отчета в компактные типы (COMPACT_DTYPES).
+
+    В отличие от clean_sales_frame, числа разбираются через parse_numbers без преобразования
+    в строки и обратно, лишние столбцы отбрасываются, а store_column (если есть) хранится
+    как категориальный столбец. Значения и имена столбцов те же, что у clean_sales_frame,
+    с точностью float32 для денежных сумм.
+
+    Raises:
+        ValueError: Если отсутствуют нужные столбцы, даты не распознаны или в числе чеков есть пропуски.
+    """
+    missing_columns = [col for col in REQUIRED_COLUMNS if col not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Отсутствуют столбцы: {missing_columns}")
+
+    dates = pd.to_datetime(df["По дням"], errors="coerce", dayfirst=True)
+    if dates.isna().any():
+        logger.error("Проблемные даты:\n%s", df[dates.isna()])
+        raise ValueError("Некоторые даты не распознаны! Проверь формат.")
+
+    checks = parse_numbers(df["Количество чеков"], thousands=",")
+    if np.isnan(checks).any():
+        raise ValueError("В столбце 'Количество чеков' есть пустые значения")
+
+    columns = {}
+    if store_column in df.columns:
+        columns[store_column] = pd.Categorical(df[store_column])
+    columns["date"] = dates.to_numpy().astype(COMPACT_DTYPES["date"])
+    columns["checks"] = checks.astype(COMPACT_DTYPES["checks"])
+    columns["avg_check"] = parse_numbers(df["Средняя сумма чека"], decimal=",").astype(COMPACT_DTYPES["avg_check"])
+    columns["total_sales"] = parse_numbers(df["Сумма продажи"], decimal=",").astype(COMPACT_DTYPES["total_sales"])
+    # Номер дня от минимальной даты
+    day_offset = columns["date"].astype("datetime64[D]").astype(np.int64)
+    columns["day_number"] = (day_offset - day_offset.min() + 1).astype(COMPACT_DTYPES["day_number"])
+    return pd.DataFrame(columns, index=pd.RangeIndex(len(df)))
 
 
 class DataLoader:
-    def __init__(self):
+    def __init__(self, cache=None, compact=False):
         self.df = None
+        self.cache = cache
+        self.compact = compact
+
+    def load_file(self, file_path):
+        """Загружает файл без диалогов (можно вызывать из фонового потока); ошибки пробрасываются."""
+        self.df = read_sales_excel(file_path, cache=self.cache, compact=self.compact)
+        return self.df
 
     def load_data(self):
+        # tkinter нужен только для диалогов: модуль используется и без GUI (CLI, процессы-исполнители)
+        from tkinter import filedialog, messagebox
+
         file_path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")])
         if not file_path:
             messagebox.showwarning("Ошибка", "Файл не выбран!")
             return False
 
         try:
-            df = pd.read_excel(file_path, engine="openpyxl")
-            print("Заголовки столбцов:", df.columns)
-
-            df = df.loc[:, ~df.columns.str.contains("^Unnamed")]
-            required_columns = ["По дням", "Количество чеков", "Средняя сумма чека", "Сумма продажи"]
-            missing_columns = [col for col in required_columns if col not in df.columns]
-            if missing_columns:
-                messagebox.showerror("Ошибка", f"Отсутствуют столбцы: {missing_columns}")
-                return False
-
-            df["По дням"] = pd.to_datetime(df["По дням"], errors="coerce", dayfirst=True)
-            if df["По дням"].isna().sum() > 0:
-                messagebox.showerror("Ошибка", "Некоторые даты не распознаны! Проверь формат.")
-                print("Проблемные даты:", df[df["По дням"].isna()])
-                return False
-
-            # Переименовываем столбцы
-            df.rename(columns={
-                "По дням": "date",
-                "Количество чеков": "checks",
-                "Средняя сумма чека": "avg_check",
-                "Сумма продажи": "total_sales"
-            }, inplace=True)
-
-            # Преобразуем числа
-            df["checks"] = df["checks"].astype(str).str.replace(",", "").astype(int)
-            df["avg_check"] = df["avg_check"].astype(str).str.replace(",", ".").astype(float)
-            df["total_sales"] = df["total_sales"].astype(str).str.replace(" ", "").str.replace(",", ".").astype(float)
-
-            # Добавляем номер дня от минимальной даты
-            df["day_number"] = (df["date"] - df["date"].min()).dt.days + 1
-
-            self.df = df
+            self.load_file(file_path)
             return True
 
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return False
+
         except Exception as e:
             messagebox.showerror("Ошибка загрузки", f"Не удалось загрузить Excel: {e}")
             return False
\ No newline at end of file
@@ -1,17 +1,97 @@
 # sales_forecast/excel_exporter.py
-from openpyxl import Workbook
-from tkinter import filedialog
+from pathlib import Path
+
+import pandas as pd
+
+# Максимум строк на листе Excel
+EXCEL_MAX_ROWS = 1048576
+# Сколько строк за раз переводится из массивов столбцов в Python-объекты при записи xlsx
+CHUNK_ROWS = 10000
+
 
 class ExcelExporter:
     @staticmethod
     def save_to_excel(data):
+        from tkinter import filedialog
+
         file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
         if file_path:
-            wb = Workbook()
-            ws = wb.active
-            ws.append(["Дата", "Количество чеков", "Средняя сумма чека", "Общая сумма продаж"])
-            for _, row in data.iterrows():
-                ws.append(row.tolist())
-            wb.save(file_path)
+            ExcelExporter.write(data, file_path)
             return True
-        return False
\ No newline at end of file
+        return False
+
+    @staticmethod
+    def write(data, file_path, fmt=None, number_formats=None, text_date_columns=(), date_format="%Y-%m-%d"):
+        """
+        Сохраняет таблицу в xlsx, csv или parquet без построения книги в памяти.
+
+        Args:
+            data (pd.DataFrame): Таблица для сохранения; заголовки берутся из ее столбцов.
+            file_path: Путь к выходному файлу.
+            fmt (str): "xlsx", "csv" или "parquet"; по умолчанию определяется по расширению.
+            number_formats (dict): Числовой формат Excel для столбцов, например {"Средняя сумма чека": "0.00"}.
+            text_date_columns: Столбцы с датами, которые записываются текстом в формате date_format.
+            date_format (str): Формат дат для text_date_columns.
+        """
+        fmt = (fmt or Path(file_path).suffix.lstrip(".") or "xlsx").lower()
+
+        if text_date_columns:
+            data = data.copy()
+            for column in text_date_columns:
+                data[column] = _as_text_dates(data[column], date_format)
+
+        if fmt == "csv":
+            data.to_csv(file_path, index=False)
+        elif fmt == "parquet":
+            data.to_parquet(file_path, index=False)
+        elif fmt in ("xlsx", "xlsm"):
+            _write_xlsx(data, file_path, number_formats or {}, text_date_columns)
+        else:
+            raise ValueError(f"Неизвестный формат выгрузки: {fmt}")
+
+
+def _as_text_dates(series, date_format):
+    # Даты -> строки одним векторным вызовом; нераспознанные значения сохраняются как текст
+    dates = series if pd.api.types.is_datetime64_any_dtype(series) else pd.to_datetime(series, errors="coerce")
+    text = dates.dt.strftime(date_format).astype(object)
+    not_dates = dates.isna() & series.notna()
+    text[not_dates] = series[not_dates].astype(str)
+    return text.where(series.notna(), None)
+
+
+def _write_xlsx(data, file_path, number_formats, text_date_columns):
+    if len(data) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"{len(data)} строк не помещаются на лист Excel, используйте csv или parquet")
+
+    from openpyxl import Workbook
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(list(data.columns))
+
+    # Формат ячеек столбцов: текстовые даты - "@", остальные - из number_formats
+    formats = [
+        "@" if column in text_date_columns else number_formats.get(column)
+        for column in data.columns
+    ]
+
+    for start in range(0, len(data), CHUNK_ROWS):
+        chunk = data.iloc[start:start + CHUNK_ROWS]
+        columns = []
+        for i, column in enumerate(chunk.columns):
+            values = chunk.iloc[:, i].tolist()
+            if formats[i] is not None:
+                values = [_formatted_cell(ws, value, formats[i]) for value in values]
+            columns.append(values)
+        for row in zip(*columns):
+            ws.append(row)
+
+    wb.save(file_path)
+
+
+def _formatted_cell(ws, value, number_format):
+    from openpyxl.cell import WriteOnlyCell
+
+    cell = WriteOnlyCell(ws, value=value)
+    cell.number_format = number_format
+    return cell
@@ -1,174 +1,278 @@
 # forecast.py
 
+import logging
+from functools import partial
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-from sklearn.linear_model import LinearRegression
-from sklearn.preprocessing import PolynomialFeatures
-from sklearn.pipeline import make_pipeline
-from sales_forecast.fifteenth_adjustment import adjust_fifteenth_sales  # Импортируем новый модуль
+from sales_forecast.fifteenth_adjustment import add_fifteenth_sales
+from sales_forecast.data_loader import COLUMN_RENAMES, REQUIRED_COLUMNS
+from sales_forecast.instrumentation import no_checkpoint, stage
+from sales_forecast.models import DEFAULT_MODEL, LinearTrend, get_model
+from sales_forecast.plotting import plot_forecast
+from sales_forecast.seasonal import FLOOR_FACTOR, SeasonalProfile
+from sales_forecast.trend import bootstrap_predict
+
+logger = logging.getLogger(__name__)
+
+# Жесткий диапазон среднего чека при отсечении выбросов
+MIN_AVG_CHECK = 2000
+MAX_AVG_CHECK = 7000
+
+# Квантили интервального прогноза (столбцы "<показатель> P10" и т.д.)
+QUANTILES = (0.1, 0.5, 0.9)
+
+# Доля расчета forecast(), выполненная к каждой точке проверки checkpoint (по замерам на истории
+# за 3 года, модель "poly"), - для индикатора хода работы (worker.BackgroundTask)
+CHECKPOINT_PROGRESS = {"Обучение модели": 0.3, "Корректировка по истории": 0.4, "Корректировка 15-го числа": 0.75}
+
+
+def apply_adjustments(forecast_days, forecast_checks, forecast_avg_check, profile, checkpoint=None, metrics=None,
+                      floor_factor=FLOOR_FACTOR, replicates=None, quantiles=QUANTILES):
+    """
+    Применяет к прогнозу тренда корректировки и собирает итоговую таблицу прогноза.
+
+    Args:
+        forecast_days (pd.DatetimeIndex): Дни прогноза.
+        forecast_checks, forecast_avg_check (np.ndarray): Прогноз тренда для чеков и среднего чека.
+        profile (SeasonalProfile): Сезонный профиль истории: максимумы по дням года и данные за 15-е числа.
+        checkpoint: См. SalesForecaster.forecast.
+        metrics (RunMetrics): Куда записать замеры этапов floor и fifteenth (см. instrumentation).
+        floor_factor (float): Коэффициент к историческому максимуму для нижней границы прогноза.
+        replicates (tuple): Повторы прогноза тренда (checks, avg_check) формы (B, дни), например
+            из trend.bootstrap_predict; к ним применяются те же корректировки, что и к прогнозу.
+        quantiles: Квантили повторов, которые добавляются столбцами "<показатель> P10" и т.д.
+
+    Returns:
+        pd.DataFrame: Прогноз с колонками 'Дата', 'Количество чеков', 'Средняя сумма чека', 'Общая сумма продаж'
+        (и столбцами квантилей, если переданы replicates).
+    """
+    if checkpoint is None:
+        checkpoint = no_checkpoint
+    # Опорный год каждого дня прогноза - предыдущий год этого дня
+    is_15th = forecast_days.day == 15
+
+    with stage(metrics, "floor", rows_in=len(forecast_days)) as record:
+        # Корректировка: прогноз не ниже лучших значений прошлых лет для каждого дня года
+        floor = profile.floor(forecast_days, factor=floor_factor)
+        forecast_checks = np.fmax(np.round(forecast_checks), floor[:, 0])
+        forecast_avg_check = np.fmax(forecast_avg_check, floor[:, 1])
+        if replicates is not None:
+            replicate_checks = np.fmax(np.round(replicates[0]), floor[:, 0])
+            replicate_avg_check = np.fmax(replicates[1], floor[:, 1])
+
+        # Дополнительная корректировка: учет 15-го числа каждого месяца прошлого года для Количество чеков и Средняя сумма чека
+        if is_15th.any():
+            # Средние значения за 15-е число того же месяца прошлого года; для месяцев без данных - среднее прогноза
+            values = profile.last_year_fifteenth_means(
+                forecast_days[is_15th], fallback=[forecast_checks.mean(), forecast_avg_check.mean()]
+            )
+            valid = ~np.isnan(values).any(axis=1)
+            rows = np.flatnonzero(is_15th)[valid]
+            forecast_checks[rows] = np.round(values[valid, 0])
+            forecast_avg_check[rows] = values[valid, 1]
+            if replicates is not None:
+                # Значения 15-го числа берутся из истории и одинаковы во всех повторах
+                replicate_checks[:, rows] = np.round(values[valid, 0])
+                replicate_avg_check[:, rows] = values[valid, 1]
+
+        # Создаем DataFrame с прогнозами
+        forecast_df = pd.DataFrame({
+            "Дата": forecast_days,
+            "Количество чеков": forecast_checks,
+            "Средняя сумма чека": forecast_avg_check
+        })
+
+        # Округляем количество чеков до целых чисел после всех корректировок
+        forecast_df["Количество чеков"] = forecast_df["Количество чеков"].round().astype(int)
+
+        # Вычисляем Общую сумму продаж как произведение перед корректировкой 15-го числа
+        forecast_df["Общая сумма продаж"] = forecast_df["Количество чеков"] * forecast_df["Средняя сумма чека"]
+
+        # Преобразуем столбец "Дата" в строковый формат для .str.endswith()
+        forecast_df["Дата"] = forecast_df["Дата"].astype(str)
+        record.rows_out = len(forecast_df)
+
+    checkpoint("Корректировка 15-го числа")
+
+    # Применяем корректировку 15-го числа из нового модуля
+    with stage(metrics, "fifteenth", rows_in=len(forecast_df)) as record:
+        sales_before = forecast_df["Общая сумма продаж"].to_numpy()
+        # Удвоенные суммы продаж за 15-е числа прошлого года - из профиля, без группировки истории
+        forecast_df = add_fifteenth_sales(
+            forecast_df.copy(), day_sales=profile.last_year_fifteenth_sums(forecast_days[is_15th]) * 2
+        )
+        record.rows_out = len(forecast_df)
+
+    if replicates is not None:
+        with stage(metrics, "quantiles", rows_in=len(forecast_df)):
+            # Прибавка суммы продаж за 15-е числа та же, что у прогноза
+            sales_adjustment = forecast_df["Общая сумма продаж"].to_numpy() - sales_before
+            replicate_sales = replicate_checks * replicate_avg_check + sales_adjustment
+            for column, values in [
+                ("Количество чеков", replicate_checks),
+                ("Средняя сумма чека", replicate_avg_check),
+                ("Общая сумма продаж", replicate_sales),
+            ]:
+                bands = np.quantile(values, quantiles, axis=0)
+                if column == "Количество чеков":
+                    bands = np.round(bands).astype(int)
+                for q, band in zip(quantiles, bands):
+                    forecast_df[f"{column} P{round(q * 100)}"] = band
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(
+            "Прогноз для 15-го числа каждого месяца:\n%s", forecast_df[forecast_df["Дата"].str.endswith("-15")]
+        )
+
+    return forecast_df
 
 
 class SalesForecaster:
     def __init__(self, data):
         # Преобразуем заголовки данных для соответствия коду
-        if 'По дням' in data.columns and 'Количество чеков' in data.columns and 'Средняя сумма чека' in data.columns and 'Сумма продажи' in data.columns:
-            data = data.rename(columns={
-                'По дням': 'date',
-                'Количество чеков': 'checks',
-                'Средняя сумма чека': 'avg_check',
-                'Сумма продажи': 'total_sales'
-            })
+        if all(column in data.columns for column in REQUIRED_COLUMNS):
+            data = data.rename(columns=COLUMN_RENAMES)
         self.df = data
         self.forecast_df = None
+        self.profile = None
+        self.model = None
+        # Результат fit(): начало истории и обучающие строки после отсечения выбросов (для бутстрэпа)
+        self.origin = None
+        self.train_day_numbers = None
+        self.train_targets = None
+
+    def forecast(self, start_date="2025-01-01", end_date="2025-12-31", plot=True, checkpoint=None, metrics=None,
+                 min_avg_check=MIN_AVG_CHECK, max_avg_check=MAX_AVG_CHECK, floor_factor=FLOOR_FACTOR,
+                 n_boot=0, seed=None, profile=None, model=DEFAULT_MODEL):
+        """
+        Прогноз по дням на период [start_date, end_date]: fit() и predict().
+
+        Корректировки 15-го числа для каждого дня прогноза берутся из 15-го числа того же месяца
+        предыдущего года этого дня (горизонт через границу года использует оба прошлых года).
+        При plot=True показывается окно с графиком (блокирующий plt.show());
+        для работы без GUI передайте plot=False и используйте plotting.plot_forecast(..., path=...).
+        checkpoint(название_этапа) вызывается между этапами расчета и может прервать его исключением
+        (см. worker.BackgroundTask.checkpoint).
+        metrics (instrumentation.RunMetrics) получает замеры этапов outlier_filter, fit, predict,
+        floor и fifteenth.
+        min_avg_check, max_avg_check - жесткий диапазон среднего чека при отсечении выбросов,
+        floor_factor - коэффициент нижней границы прогноза (подбираются через backtest).
+        n_boot > 0 добавляет интервальный прогноз: столбцы P10/P50/P90 по n_boot повторам
+        остаточного бутстрэпа тренда (trend.bootstrap_predict, seed - зерно генератора).
+        profile (seasonal.SeasonalProfile) - готовый профиль истории (например, загруженный с диска);
+        по умолчанию строится по self.df при первом прогнозе и запоминается в self.profile.
+        model - модель тренда: имя из models.MODELS ('poly', 'weekly', 'sklearn') или готовый объект
+        модели; обученная модель сохраняется в self.model.
+        """
+        if checkpoint is None:
+            checkpoint = no_checkpoint
 
-    def forecast(self):
         if self.df is None or self.df.empty:
-            print("Ошибка: self.df пустой!")
+            logger.error("Ошибка: self.df пустой!")
             return None
 
-        # Добавляем столбец с номером дня от начала данных
-        self.df["day_number"] = (self.df["date"] - self.df["date"].min()).dt.days + 1
+        if self.fit(checkpoint, metrics, min_avg_check, max_avg_check, model) is None:
+            return None
+        self.predict(start_date, end_date, checkpoint, metrics, floor_factor, n_boot, seed, profile)
+
+        # Визуализация тренда
+        if plot:
+            plot_forecast(self.df, self.forecast_df)
+
+        return self.forecast_df
+
+    def fit(self, checkpoint=None, metrics=None, min_avg_check=MIN_AVG_CHECK, max_avg_check=MAX_AVG_CHECK,
+            model=DEFAULT_MODEL):
+        """
+        Отсечение выбросов и обучение тренда по self.df; параметры как у forecast().
+
+        Обученная модель не зависит от периода прогноза: после fit() прогноз на любой период
+        строится через predict() без повторного обучения.
+
+        Returns:
+            SalesForecaster: self или None, если данных для обучения нет.
+        """
+        if checkpoint is None:
+            checkpoint = no_checkpoint
+
+        # Добавляем столбец с номером дня от начала данных (int32, как в компактном режиме загрузки)
+        self.df["day_number"] = ((self.df["date"] - self.df["date"].min()).dt.days + 1).astype(np.int32)
         daily_data = self.df[["day_number", "checks", "avg_check", "total_sales"]]
 
         if daily_data.empty:
-            print("Ошибка: Данные для обучения пустые!")
+            logger.error("Ошибка: Данные для обучения пустые!")
             return None
 
-        # Убираем выбросы в avg_check (добавляем жесткий диапазон)
-        Q1 = daily_data["avg_check"].quantile(0.25)
-        Q3 = daily_data["avg_check"].quantile(0.75)
-        IQR = Q3 - Q1
-        lower_bound = max(Q1 - 1.5 * IQR, 2000)  # Минимум 2000, чтобы исключить аномально низкие значения
-        upper_bound = min(Q3 + 1.5 * IQR, 7000)  # Максимум 7000, чтобы исключить аномалии
-        daily_data = daily_data[
-            (daily_data["avg_check"] >= lower_bound) & (daily_data["avg_check"] <= upper_bound)
-        ]
+        with stage(metrics, "outlier_filter", rows_in=len(daily_data)) as record:
+            # Убираем выбросы в avg_check (добавляем жесткий диапазон)
+            Q1 = daily_data["avg_check"].quantile(0.25)
+            Q3 = daily_data["avg_check"].quantile(0.75)
+            IQR = Q3 - Q1
+            lower_bound = max(Q1 - 1.5 * IQR, min_avg_check)  # Минимум, чтобы исключить аномально низкие значения
+            upper_bound = min(Q3 + 1.5 * IQR, max_avg_check)  # Максимум, чтобы исключить аномалии
+            daily_data = daily_data[
+                (daily_data["avg_check"] >= lower_bound) & (daily_data["avg_check"] <= upper_bound)
+            ]
+            record.rows_out = len(daily_data)
 
         # Подготовка данных для регрессии
-        days = daily_data[["day_number"]].values
-        start_date = pd.to_datetime("2025-01-01")
-        end_date = pd.to_datetime("2025-12-31")
-        forecast_days = pd.date_range(start=start_date, end=end_date)
-        forecast_day_numbers = np.array((forecast_days - self.df["date"].min()).days) + 1
-        forecast_day_numbers = forecast_day_numbers.reshape(-1, 1)
-
-        # Прогнозирование только Количество чеков и Средняя сумма чека
-        forecast_checks = {}
-        forecast_avg_check = {}
-        for column in ["checks", "avg_check"]:
-            model = make_pipeline(PolynomialFeatures(degree=2), LinearRegression())
-            model.fit(days, daily_data[column])
-            if column == "checks":
-                forecast_checks = model.predict(forecast_day_numbers)
-            else:
-                forecast_avg_check = model.predict(forecast_day_numbers)
+        self.origin = self.df["date"].min()
+        self.train_day_numbers = daily_data["day_number"].to_numpy()
+        self.train_targets = daily_data[["checks", "avg_check"]].to_numpy(dtype=float)
 
-        # Создаем DataFrame с прогнозами
-        self.forecast_df = pd.DataFrame({
-            "Дата": forecast_days,
-            "Количество чеков": forecast_checks,
-            "Средняя сумма чека": forecast_avg_check
-        })
+        checkpoint("Обучение модели")
 
-        # Корректировка: прогноз не ниже лучших значений прошлых лет для каждого дня месяца
-        self.df["day_of_year"] = self.df["date"].dt.dayofyear  # Номер дня в году
-        self.forecast_df["day_of_year"] = self.forecast_df["Дата"].dt.dayofyear
-
-        column_mapping = {
-            "Количество чеков": "checks",
-            "Средняя сумма чека": "avg_check"
-        }
-
-        for forecast_col, original_col in column_mapping.items():
-            # Максимальные значения по дням года из исторических данных
-            max_values = self.df.groupby("day_of_year")[original_col].max() * 1.05
-            # Применяем корректировку
-            if forecast_col == "Количество чеков":
-                self.forecast_df[forecast_col] = self.forecast_df[forecast_col].apply(
-                    lambda x: max(round(x), max_values.get(self.forecast_df.loc[self.forecast_df[forecast_col] == x, "day_of_year"].iloc[0], 0))
-                )
-            else:
-                self.forecast_df[forecast_col] = self.forecast_df.apply(
-                    lambda row: max(max_values.get(row["day_of_year"], 0), row[forecast_col]),
-                    axis=1
-                )
+        # Прогнозирование только Количество чеков и Средняя сумма чека: оба показателя - одной моделью
+        model = get_model(model)
+        with stage(metrics, "fit", rows_in=len(daily_data)):
+            model.fit(self.train_day_numbers, self.train_targets, origin=np.datetime64(self.origin, "D"))
+        self.model = model
+        return self
 
-        # Дополнительная корректировка: учет 15-го числа каждого месяца из 2024 года для Количество чеков и Средняя сумма чека
-        # Фильтруем данные за 2024 год
-        df_2024 = self.df[self.df["date"].dt.year == 2024]
-        # Находим средние значения за 15-е число каждого месяца в 2024 году
-        checks_15th_2024 = df_2024[df_2024["date"].dt.day == 15].groupby(df_2024["date"].dt.month)["checks"].mean()
-        avg_check_15th_2024 = df_2024[df_2024["date"].dt.day == 15].groupby(df_2024["date"].dt.month)["avg_check"].mean()
-
-        # Применяем корректировку к прогнозу 2025 года для 15-го числа каждого месяца
-        for month in range(1, 13):
-            date_15th = pd.to_datetime(f"15-{month:02d}-2025", dayfirst=True).strftime("%Y-%m-%d")  # Используем формат "YYYY-MM-DD" с dayfirst=True
-            if date_15th in self.forecast_df["Дата"].values:
-                adjustment_checks = checks_15th_2024.get(month, self.forecast_df["Количество чеков"].mean())
-                adjustment_avg_check = avg_check_15th_2024.get(month, self.forecast_df["Средняя сумма чека"].mean())
-                if not np.isnan(adjustment_checks) and not np.isnan(adjustment_avg_check):
-                    self.forecast_df.loc[self.forecast_df["Дата"] == date_15th, "Количество чеков"] = int(round(adjustment_checks))
-                    self.forecast_df.loc[self.forecast_df["Дата"] == date_15th, "Средняя сумма чека"] = adjustment_avg_check
+    def predict(self, start_date="2025-01-01", end_date="2025-12-31", checkpoint=None, metrics=None,
+                floor_factor=FLOOR_FACTOR, n_boot=0, seed=None, profile=None):
+        """
+        Прогноз обученной в fit() модели на период [start_date, end_date] с корректировками по истории;
+        параметры как у forecast(). Результат также сохраняется в self.forecast_df.
+        """
+        if checkpoint is None:
+            checkpoint = no_checkpoint
 
-        # Округляем количество чеков до целых чисел после всех корректировок
-        self.forecast_df["Количество чеков"] = self.forecast_df["Количество чеков"].round().astype(int)
+        forecast_days = pd.date_range(start=start_date, end=end_date)
+        forecast_day_numbers = np.array((forecast_days - self.origin).days) + 1
 
-        # Вычисляем Общую сумму продаж как произведение перед корректировкой 15-го числа
-        self.forecast_df["Общая сумма продаж"] = self.forecast_df["Количество чеков"] * self.forecast_df["Средняя сумма чека"]
+        with stage(metrics, "predict", rows_in=len(forecast_day_numbers)) as record:
+            prediction = self.model.predict(forecast_day_numbers)
+            forecast_checks = prediction[:, 0]
+            forecast_avg_check = prediction[:, 1]
+            record.rows_out = len(forecast_checks)
 
-        # Преобразуем столбец "Дата" в строковый формат для .str.endswith()
-        self.forecast_df["Дата"] = self.forecast_df["Дата"].astype(str)
-
-        # Проверяем значения Общая сумма продаж для 15-го числа до корректировки
-        print("Значения Общая сумма продаж для 15-го числа до корректировки:")
-        print(self.forecast_df[self.forecast_df["Дата"].str.endswith("-15")][["Дата", "Общая сумма продаж"]])
-
-        # Проверяем, есть ли 15-е числа в прогнозе (используем формат "YYYY-MM-DD")
-        print("Тип данных столбца 'Дата' до фильтрации:", self.forecast_df["Дата"].dtype)
-        print("Первые 5 строк 'Дата' до фильтрации:", self.forecast_df["Дата"].head())
-        fifteenth_dates = self.forecast_df[self.forecast_df["Дата"].str.endswith("-15")]
-        print("Даты 15-го числа в прогнозе 2025 года:")
-        print(fifteenth_dates["Дата"].tolist() if not fifteenth_dates.empty else "Нет строк с 15-м числом")
-
-        # Применяем корректировку 15-го числа из нового модуля
-        corrected_forecast_df = adjust_fifteenth_sales(self.forecast_df.copy(), self.df)  # Используем копию и сохраняем результат
-        print("Значения Общая сумма продаж для 15-го числа после корректировки:")
-        print(corrected_forecast_df[corrected_forecast_df["Дата"].str.endswith("-15")][["Дата", "Общая сумма продаж"]])
-        print("Тип данных столбца 'Дата' после корректировки:", corrected_forecast_df["Дата"].dtype)
-        print("Первые 5 строк 'Дата' после корректировки:", corrected_forecast_df["Дата"].head())
-        print("Проверяем корректированные данные для 15-го числа:")
-        corrected_fifteenth_dates = corrected_forecast_df[corrected_forecast_df["Дата"].str.endswith("-15")]
-        print(corrected_fifteenth_dates if not corrected_fifteenth_dates.empty else "Нет корректированных строк с 15-м числом")
-
-        # Обновляем self.forecast_df с корректированными данными
-        self.forecast_df = corrected_forecast_df
-
-        # Проверяем, сохранились ли корректированные строки
-        final_fifteenth_dates = self.forecast_df[self.forecast_df["Дата"].str.endswith("-15")]
-        print("Итоговые даты 15-го числа в прогнозе 2025 года:")
-        print(final_fifteenth_dates if not final_fifteenth_dates.empty else "Нет итоговых строк с 15-м числом")
-
-        # Удаляем вспомогательный столбец (если он еще есть)
-        if "day_of_year" in self.forecast_df.columns:
-            self.forecast_df.drop(columns=["day_of_year"], inplace=True)
-
-        print("\nПрогноз по дням (с округлением Количество чеков и корректировкой 15-го числа):\n", self.forecast_df.head())
-        print("\nПолный прогноз для 15-го числа каждого месяца:")
-        print(self.forecast_df[self.forecast_df["Дата"].str.endswith("-15")])
+        replicates = None
+        if n_boot:
+            # Повторы строятся на признаках той же модели (для sklearn - полином той же степени)
+            features = None
+            if isinstance(self.model, LinearTrend):
+                features = partial(self.model.features, origin=np.datetime64(self.origin, "D"))
+            with stage(metrics, "bootstrap", rows_in=len(self.train_day_numbers)):
+                boot = bootstrap_predict(
+                    self.train_day_numbers, self.train_targets, forecast_day_numbers, n_boot=n_boot, seed=seed,
+                    degree=getattr(self.model, "degree", 2), features=features
+                )
+                replicates = (boot[..., 0], boot[..., 1])
 
-        # Визуализация тренда
-        historical_sales = self.df.groupby("date")["total_sales"].sum()
-        forecast_sales = self.forecast_df.set_index("Дата")["Общая сумма продаж"]
-
-        plt.figure(figsize=(12, 5))
-        plt.plot(historical_sales.index, historical_sales.values, label="Фактические данные", marker="o")
-        plt.plot(forecast_days, forecast_sales.values, label="Прогноз 2025", marker="o", linestyle="dashed")
-        plt.xlabel("Дата")
-        plt.ylabel("Общая сумма продаж")
-        plt.title("Динамика продаж (История и Прогноз 2025)")
-        plt.legend()
-        plt.grid()
-        plt.show()
-
-        return self.forecast_df
\ No newline at end of file
+        checkpoint("Корректировка по истории")
+
+        # Сезонный профиль истории строится один раз: повторный прогноз (например, с другими
+        # параметрами) обходится без группировок по истории
+        if profile is not None:
+            self.profile = profile
+        elif self.profile is None:
+            with stage(metrics, "profile", rows_in=len(self.df)):
+                self.profile = SeasonalProfile.from_history(self.df)
+
+        self.forecast_df = apply_adjustments(
+            forecast_days, forecast_checks, forecast_avg_check, self.profile, checkpoint, metrics, floor_factor,
+            replicates
+        )
+        return self.forecast_df
@@ -1,9 +1,14 @@
 # sales_forecast/gui.py
 import tkinter as tk
-from tkinter import messagebox
-from sales_forecast.data_loader import DataLoader
-from sales_forecast.forecast import SalesForecaster
-from sales_forecast.excel_exporter import ExcelExporter
+from tkinter import filedialog, messagebox, ttk
+
+from sales_forecast.worker import BackgroundTask
+
+# pandas, openpyxl, sklearn и matplotlib импортируются в обработчиках кнопок,
+# чтобы окно появлялось сразу, а не после загрузки тяжелых зависимостей
+
+# Период опроса очереди событий фоновой задачи, мс
+POLL_INTERVAL_MS = 100
 
 
 class SalesForecastApp:
@@ -11,8 +16,11 @@ class SalesForecastApp:
         self.root = root
         self.root.title("Sales Forecast Tool")
 
-        self.data_loader = DataLoader()
+        self.data_loader = None
         self.forecaster = None
+        self.task = None
+        self._on_task_done = None
+        self._on_task_cancel = None
 
         self.label = tk.Label(root, text="Выберите файл с данными (CSV или Excel)")
         self.label.pack(pady=10)
@@ -26,25 +34,139 @@ class SalesForecastApp:
         self.save_button = tk.Button(root, text="Сохранить в Excel", command=self.save_results, state=tk.DISABLED)
         self.save_button.pack(pady=10)
 
+        self.progress = ttk.Progressbar(root, mode="determinate", maximum=100, length=300)
+        self.progress.pack(pady=(10, 0), padx=10)
+
+        self.status_label = tk.Label(root, text="")
+        self.status_label.pack(pady=5)
+
+        self.cancel_button = tk.Button(root, text="Отмена", command=self.cancel_task, state=tk.DISABLED)
+        self.cancel_button.pack(pady=(0, 10))
+
     def load_data(self):
-        if self.data_loader.load_data():
-            self.forecaster = SalesForecaster(self.data_loader.df)
+        from sales_forecast.cache import FrameCache
+        from sales_forecast.data_loader import DataLoader
+        from sales_forecast.forecast import SalesForecaster
+
+        # Диалог выбора файла - в главном потоке, разбор Excel - в фоновом
+        file_path = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx")])
+        if not file_path:
+            messagebox.showwarning("Ошибка", "Файл не выбран!")
+            return
+
+        if self.data_loader is None:
+            self.data_loader = DataLoader(cache=FrameCache())
+
+        def on_done(forecaster):
+            self.forecaster = forecaster
             self.process_button.config(state=tk.NORMAL)
+            self.save_button.config(state=tk.DISABLED)
             messagebox.showinfo("Успех", "Данные успешно загружены!")
 
+        self._run_task([
+            ("Чтение Excel", lambda _: self.data_loader.load_file(file_path)),
+            ("Подготовка данных", lambda df: SalesForecaster(df)),
+        ], on_done, error_title="Ошибка загрузки")
+
     def process_data(self):
         if self.forecaster is None:
             messagebox.showerror("Ошибка", "Сначала загрузите данные!")
             return
 
-        self.forecaster.forecast()
-        self.save_button.config(state=tk.NORMAL)
-        messagebox.showinfo("Успех", "Прогноз продаж по дням на 2025 год рассчитан!")
+        from sales_forecast.forecast import CHECKPOINT_PROGRESS
+        from sales_forecast.plotting import plot_forecast
+
+        forecaster = self.forecaster
+
+        def on_done(forecast_df):
+            if forecast_df is None:
+                messagebox.showerror("Ошибка", "Нет данных для прогноза!")
+                return
+            self.save_button.config(state=tk.NORMAL)
+            messagebox.showinfo("Успех", "Прогноз продаж по дням на 2025 год рассчитан!")
+            # Окно matplotlib можно открыть только из главного потока
+            plot_forecast(forecaster.df, forecast_df)
+
+        def on_cancel():
+            # Прерванный расчет мог оставить промежуточный результат - сохранять его нельзя
+            forecaster.forecast_df = None
+            self.save_button.config(state=tk.DISABLED)
+
+        self._run_task([
+            # Точки проверки внутри forecast() двигают индикатор по долям CHECKPOINT_PROGRESS
+            ("Прогноз", lambda _: forecaster.forecast(plot=False, checkpoint=self.task.checkpoint),
+             CHECKPOINT_PROGRESS),
+        ], on_done, on_cancel=on_cancel)
 
     def save_results(self):
-        if self.forecaster.forecast_df is None:
+        from sales_forecast.excel_exporter import ExcelExporter
+
+        if self.forecaster is None or self.forecaster.forecast_df is None:
             messagebox.showerror("Ошибка", "Нет данных для сохранения!")
             return
 
-        if ExcelExporter.save_to_excel(self.forecaster.forecast_df):
-            messagebox.showinfo("Успех", "Прогноз сохранен в Excel!")
\ No newline at end of file
+        file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
+        if not file_path:
+            return
+
+        forecast_df = self.forecaster.forecast_df
+        self._run_task([
+            ("Сохранение в Excel", lambda _: ExcelExporter.write(forecast_df, file_path)),
+        ], lambda _: messagebox.showinfo("Успех", "Прогноз сохранен в Excel!"))
+
+    def cancel_task(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.status_label.config(text="Отмена после текущего этапа...")
+            self.cancel_button.config(state=tk.DISABLED)
+
+    def _run_task(self, stages, on_done, on_cancel=None, error_title="Ошибка"):
+        self._on_task_done = on_done
+        self._on_task_cancel = on_cancel
+        self._error_title = error_title
+        self._set_busy(True)
+        self.progress["value"] = 0
+        # Задача сохраняется до запуска потока: этапы обращаются к self.task.checkpoint
+        self.task = BackgroundTask(stages)
+        self.task.start()
+        self.root.after(POLL_INTERVAL_MS, self._poll_task)
+
+    def _poll_task(self):
+        for event, payload in self.task.poll():
+            if event == "progress":
+                percent, text = payload
+                self.progress["value"] = percent
+                self.status_label.config(text=text)
+            elif event == "done":
+                self._finish_task("Готово")
+                self._on_task_done(payload)
+                return
+            elif event == "cancelled":
+                self._finish_task("Отменено")
+                if self._on_task_cancel is not None:
+                    self._on_task_cancel()
+                return
+            elif event == "error":
+                self._finish_task("Ошибка")
+                messagebox.showerror(self._error_title, str(payload))
+                return
+        self.root.after(POLL_INTERVAL_MS, self._poll_task)
+
+    def _finish_task(self, status):
+        self.task = None
+        self._set_busy(False)
+        self.status_label.config(text=status)
+
+    def _set_busy(self, busy):
+        # Во время фоновой задачи доступна только отмена
+        if busy:
+            self._button_states = {
+                button: button.cget("state") for button in (self.button, self.process_button, self.save_button)
+            }
+            for button in self._button_states:
+                button.config(state=tk.DISABLED)
+            self.cancel_button.config(state=tk.NORMAL)
+        else:
+            for button, state in self._button_states.items():
+                button.config(state=state)
+            self.cancel_button.config(state=tk.DISABLED)
@@ -0,0 +1,122 @@
+# sales_forecast/instrumentation.py
+
+import json
+import logging
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+def no_checkpoint(stage):
+    """Точка проверки по умолчанию: ничего не делает (см. SalesForecaster.forecast, checkpoint)."""
+
+
+class StageMetrics:
+    """Замер одного этапа: время, число строк на входе и выходе, пиковая память (если включена)."""
+
+    def __init__(self, name, rows_in=None):
+        self.name = name
+        self.rows_in = rows_in
+        self.rows_out = None
+        self.wall_s = None
+        self.peak_mb = None
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "wall_s": self.wall_s,
+            "rows_in": self.rows_in,
+            "rows_out": self.rows_out,
+            "peak_mb": self.peak_mb,
+        }
+
+
+class RunMetrics:
+    """
+    Метрики одного запуска конвейера (загрузка -> очистка -> ... -> выгрузка).
+
+    trace_memory=True включает tracemalloc для замера пиковой памяти этапов; это заметно
+    замедляет код на чистом Python (openpyxl), поэтому по умолчанию выключено.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+
+    def to_dict(self):
+        return {
+            "total_s": sum(stage.wall_s or 0 for stage in self.stages),
+            "stages": [stage.to_dict() for stage in self.stages],
+        }
+
+    def dump_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+
+
+@contextmanager
+def stage(metrics, name, rows_in=None):
+    """
+    Замеряет этап конвейера и пишет итог в лог на уровне DEBUG.
+
+    Args:
+        metrics (RunMetrics): Куда добавить замер; None - только запись в лог.
+        name (str): Имя этапа (load, clean, outlier_filter, fit, predict, floor, fifteenth, export).
+        rows_in (int): Число строк на входе этапа.
+
+    Yields:
+        StageMetrics: Замер этапа; внутри блока можно задать rows_out.
+    """
+    record = StageMetrics(name, rows_in)
+    trace = metrics is not None and metrics.trace_memory
+    started_tracing = False
+    if trace:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            started_tracing = True
+        tracemalloc.reset_peak()
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.wall_s = time.perf_counter() - started
+        if trace:
+            record.peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+            if started_tracing:
+                tracemalloc.stop()
+        if metrics is not None:
+            metrics.stages.append(record)
+        logger.debug("этап %s: %.4f с, строк %s -> %s", name, record.wall_s, record.rows_in, record.rows_out)
+
+
+@contextmanager
+def profiled(path, profiler="cprofile"):
+    """
+    Профилирует блок кода и сохраняет результат в path.
+
+    profiler="cprofile" - статистика pstats (смотреть через python -m pstats или snakeviz),
+    profiler="pyinstrument" - HTML-отчет (нужен установленный pyinstrument).
+    """
+    if profiler == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profile = Profiler()
+        profile.start()
+        try:
+            yield
+        finally:
+            profile.stop()
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(profile.output_html())
+    else:
+        import cProfile
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            profile.dump_stats(path)
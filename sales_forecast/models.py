@@ -0,0 +1,214 @@
+# sales_forecast/models.py
+"""
+Модели тренда, выбираемые по имени (get_model): прогнозисты обучают тренд checks и avg_check
+через этот интерфейс, а не создают модель сами.
+
+Модель обучается по номерам дней (1 - первый день истории ряда) и показателям формы (n, k)
+и прогнозирует форму (h, k). Флаги класса сообщают вызывающему коду, какой путь быстрее:
+- supports_batch: fit принимает коды рядов (groups) и учит все ряды одним решением
+  (BatchForecaster, backtest); иначе ряды учатся по одному;
+- supports_incremental: модель обучается по накопителям нормальных уравнений
+  (normal_equations / fit_normal_equations), их можно складывать по мере поступления
+  данных (IncrementalForecaster).
+
+Встроенные модели:
+- "poly" (по умолчанию) - полином 2-й степени, нормальные уравнения в NumPy, оба показателя
+  одним решением;
+- "weekly" - тот же полином плюс поправки по дню недели;
+- "sklearn" - прежний конвейер PolynomialFeatures + LinearRegression (нужен scikit-learn).
+"""
+
+import copy
+
+import numpy as np
+
+from sales_forecast.trend import design_matrix, feature_normal_equations, normal_equations, solve_normal_equations
+
+DEFAULT_MODEL = "poly"
+
+# Имя модели -> класс; пополняется декоратором register_model
+MODELS = {}
+
+
+def register_model(cls):
+    """Регистрирует класс модели под его именем cls.name."""
+    MODELS[cls.name] = cls
+    return cls
+
+
+def get_model(model=DEFAULT_MODEL, **params):
+    """
+    Модель по имени (или уже созданная модель без изменений).
+
+    Raises:
+        ValueError: Если модели с таким именем нет.
+    """
+    if not isinstance(model, str):
+        return model
+    if model not in MODELS:
+        raise ValueError(f"Неизвестная модель: {model}. Доступны: {', '.join(sorted(MODELS))}")
+    return MODELS[model](**params)
+
+
+def fit_each(model, day_numbers, targets, groups, n_groups, origin=None):
+    """
+    Обучает копию модели на каждом ряду отдельно (для моделей без supports_batch).
+
+    Returns:
+        list: Обученные модели по кодам рядов 0..n_groups-1; None - у ряда нет строк.
+    """
+    order = np.argsort(groups, kind="stable")
+    bounds = np.searchsorted(groups[order], np.arange(n_groups + 1))
+    fitted = []
+    for code in range(n_groups):
+        rows = order[bounds[code]:bounds[code + 1]]
+        if len(rows) == 0:
+            fitted.append(None)
+            continue
+        fitted.append(copy.copy(model).fit(
+            day_numbers[rows], targets[rows], origin=None if origin is None else origin[code]
+        ))
+    return fitted
+
+
+class LinearTrend:
+    """
+    База моделей, линейных по признакам: обучение - решение нормальных уравнений X^T X b = X^T y.
+
+    Подклассы задают features(); коэффициенты coef имеют форму (d, k) для одного ряда
+    и (n_groups, d, k) после обучения пачкой.
+    """
+
+    name = None
+    supports_batch = True
+    supports_incremental = True
+
+    def __init__(self):
+        self.coef = None
+        self.origin = None
+
+    @property
+    def n_features(self):
+        return self.features(np.ones(1), np.datetime64("1970-01-01", "D")).shape[-1]
+
+    def features(self, day_numbers, origin=None):
+        """Матрица признаков формы (..., d) для номеров дней; origin - дата дня 1 (np.datetime64)."""
+        raise NotImplementedError
+
+    def normal_equations(self, day_numbers, targets, groups=None, n_groups=1, origin=None):
+        """Накопители (xtx, xty) форм (n_groups, d, d) и (n_groups, d, k); origin - дата дня 1 ряда."""
+        row_origin = origin if groups is None or origin is None else np.asarray(origin)[groups]
+        return feature_normal_equations(self.features(day_numbers, row_origin), targets, groups, n_groups)
+
+    def fit_normal_equations(self, xtx, xty, origin=None):
+        self.coef = solve_normal_equations(xtx, xty)
+        self.origin = origin
+        return self
+
+    def fit(self, day_numbers, targets, groups=None, n_groups=1, origin=None):
+        """
+        Обучает модель; с groups - все ряды сразу (origin - массив дат дня 1 по рядам).
+
+        Args:
+            day_numbers (np.ndarray): Номера дней, форма (n,).
+            targets (np.ndarray): Показатели, форма (n, k).
+            groups (np.ndarray): Код ряда для каждой строки; None - один ряд.
+            n_groups (int): Число рядов.
+            origin: Дата дня 1 (для моделей, которым нужен календарь).
+        """
+        targets = np.asarray(targets, dtype=float).reshape(len(day_numbers), -1)
+        xtx, xty = self.normal_equations(day_numbers, targets, groups, n_groups, origin)
+        if groups is None:
+            xtx, xty = xtx[0], xty[0]
+        return self.fit_normal_equations(xtx, xty, origin)
+
+    def predict(self, day_numbers):
+        """
+        Прогноз формы (h, k); после обучения пачкой day_numbers имеет форму (n_groups, h),
+        результат - (n_groups, h, k).
+        """
+        origin = self.origin
+        if origin is not None and np.ndim(origin) and np.ndim(day_numbers) > np.ndim(origin):
+            origin = np.asarray(origin)[:, None]
+        return self.features(day_numbers, origin) @ self.coef
+
+
+@register_model
+class PolynomialTrend(LinearTrend):
+    """Полиномиальный тренд [1, x, x^2, ...], x - номер дня / trend.DAY_SCALE."""
+
+    name = "poly"
+
+    def __init__(self, degree=2):
+        super().__init__()
+        self.degree = degree
+
+    def features(self, day_numbers, origin=None):
+        return design_matrix(day_numbers, self.degree)
+
+    def normal_equations(self, day_numbers, targets, groups=None, n_groups=1, origin=None):
+        # Матрица X^T X полинома собирается из моментов x^p, без произведений пар признаков
+        return normal_equations(day_numbers, targets, groups, n_groups, self.degree)
+
+
+@register_model
+class WeeklyTrend(LinearTrend):
+    """
+    Полиномиальный тренд плюс сдвиг уровня по дню недели (6 индикаторов, понедельник - базовый день).
+
+    Нужна дата дня 1 (origin): по ней номер дня переводится в день недели.
+    """
+
+    name = "weekly"
+
+    def __init__(self, degree=2):
+        super().__init__()
+        self.degree = degree
+
+    def features(self, day_numbers, origin=None):
+        if origin is None:
+            raise ValueError("Для модели weekly нужна дата начала ряда (origin)")
+        day_numbers = np.asarray(day_numbers)
+        # 1970-01-01 - четверг (3 при понедельнике = 0)
+        first_weekday = (np.asarray(origin, dtype="datetime64[D]").astype(np.int64) + 3) % 7
+        weekday = (first_weekday + day_numbers.astype(np.int64) - 1) % 7
+        weekday_dummies = (weekday[..., None] == np.arange(1, 7)).astype(float)
+        return np.concatenate([design_matrix(day_numbers, self.degree), weekday_dummies], axis=-1)
+
+
+@register_model
+class SklearnTrend:
+    """
+    Полиномиальная регрессия scikit-learn (PolynomialFeatures + LinearRegression) по каждому показателю.
+
+    Прежняя модель SalesForecaster; медленнее "poly" на коротких рядах из-за накладных расходов
+    sklearn на каждое обучение, поддерживается для сравнения результатов.
+    """
+
+    name = "sklearn"
+    supports_batch = False
+    supports_incremental = False
+
+    def __init__(self, degree=2):
+        self.degree = degree
+        self.pipelines = None
+
+    def fit(self, day_numbers, targets, groups=None, n_groups=1, origin=None):
+        if groups is not None:
+            raise ValueError("Модель sklearn не обучается пачкой рядов")
+        # sklearn импортируется только здесь: его загрузка занимает больше секунды
+        from sklearn.linear_model import LinearRegression
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import PolynomialFeatures
+
+        days = np.asarray(day_numbers).reshape(-1, 1)
+        targets = np.asarray(targets, dtype=float).reshape(len(days), -1)
+        self.pipelines = [
+            make_pipeline(PolynomialFeatures(degree=self.degree), LinearRegression()).fit(days, targets[:, j])
+            for j in range(targets.shape[1])
+        ]
+        return self
+
+    def predict(self, day_numbers):
+        days = np.asarray(day_numbers).reshape(-1, 1)
+        return np.column_stack([pipeline.predict(days) for pipeline in self.pipelines])
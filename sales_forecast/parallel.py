@@ -0,0 +1,139 @@
+# sales_forecast/parallel.py
+
+import os
+import traceback
+from functools import partial
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+import pandas as pd
+
+from sales_forecast.batch import BatchForecaster
+from sales_forecast.data_loader import read_sales_excel
+
+
+class TaskResult(NamedTuple):
+    """Результат одной независимой задачи: value при успехе или текст ошибки в error."""
+    key: Any
+    value: Any
+    error: Optional[str]
+
+    @property
+    def ok(self):
+        return self.error is None
+
+
+def _run_chunk(func, chunk):
+    # Выполняется в процессе-исполнителе: ошибка одного входа не прерывает остальные
+    results = []
+    for index, item in chunk:
+        try:
+            results.append((index, func(item), None))
+        except Exception:
+            results.append((index, None, traceback.format_exc()))
+    return results
+
+
+def run_parallel(func, items, workers=None, chunksize=1, keys=None):
+    """
+    Выполняет func(item) для каждого элемента items в пуле процессов.
+
+    Args:
+        func: Функция уровня модуля или partial от нее (должна сериализоваться через pickle).
+        items: Независимые входы (пути к файлам, группы магазинов и т.п.).
+        workers (int): Число процессов; None - по числу ядер, 1 - без пула, в текущем процессе.
+        chunksize (int): Сколько входов отправлять в процесс одной задачей.
+        keys: Подписи входов для отчета; по умолчанию сами элементы.
+
+    Returns:
+        list[TaskResult]: Результаты в порядке items, независимо от порядка завершения.
+    """
+    items = list(items)
+    keys = items if keys is None else list(keys)
+    workers = workers or os.cpu_count() or 1
+    indexed = list(enumerate(items))
+    chunks = [indexed[i:i + chunksize] for i in range(0, len(indexed), chunksize)]
+
+    raw = []
+    if workers == 1 or len(chunks) <= 1:
+        for chunk in chunks:
+            raw.extend(_run_chunk(func, chunk))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Держим в очереди не больше 2 задач на процесс, чтобы не сериализовать все входы сразу
+            pending = iter(chunks)
+            running = {}
+            for chunk in pending:
+                running[executor.submit(_run_chunk, func, chunk)] = chunk
+                if len(running) >= workers * 2:
+                    break
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk = running.pop(future)
+                    try:
+                        raw.extend(future.result())
+                    except Exception:
+                        # Процесс-исполнитель упал целиком: помечаем все входы этой задачи
+                        error = traceback.format_exc()
+                        raw.extend((index, None, error) for index, _ in chunk)
+                    next_chunk = next(pending, None)
+                    if next_chunk is not None:
+                        running[executor.submit(_run_chunk, func, next_chunk)] = next_chunk
+
+    raw.sort(key=lambda result: result[0])
+    return [TaskResult(keys[index], value, error) for index, value, error in raw]
+
+
+def _forecast_file(file_path, forecast_params):
+    df = read_sales_excel(file_path)
+    df["store_id"] = Path(file_path).stem
+    return BatchForecaster(df).forecast(**forecast_params)
+
+
+def _forecast_group(df, forecast_params, store_column="store_id"):
+    return BatchForecaster(df, store_column=store_column).forecast(**forecast_params)
+
+
+def _combine(results):
+    frames = [result.value for result in results if result.ok]
+    failures = [result for result in results if not result.ok]
+    combined = pd.concat(frames, ignore_index=True) if frames else None
+    return combined, failures
+
+
+def forecast_files(file_paths, workers=None, chunksize=1, start_date="2025-01-01", end_date="2025-12-31",
+                   **forecast_params):
+    """
+    Прогноз по нескольким рабочим книгам (по одной на филиал) в пуле процессов.
+
+    store_id каждого файла - имя файла без расширения. Период [start_date, end_date] и
+    forecast_params (min_avg_check, max_avg_check, floor_factor, model, granularity) передаются
+    в BatchForecaster.forecast каждого файла.
+
+    Returns:
+        tuple: (объединенный прогноз в порядке file_paths или None, список TaskResult с ошибками).
+    """
+    forecast_params = {"start_date": start_date, "end_date": end_date, **forecast_params}
+    task = partial(_forecast_file, forecast_params=forecast_params)
+    return _combine(run_parallel(task, file_paths, workers=workers, chunksize=chunksize))
+
+
+def forecast_stores(df, workers=None, stores_per_task=50, store_column="store_id", start_date="2025-01-01",
+                    end_date="2025-12-31", **forecast_params):
+    """
+    Прогноз по длинной таблице магазинов: группы магазинов распределяются по процессам.
+
+    Период и forecast_params - как в forecast_files.
+
+    Returns:
+        tuple: (объединенный прогноз, отсортированный по store_id, или None, список TaskResult с ошибками).
+    """
+    stores = sorted(df[store_column].unique())
+    groups = [stores[i:i + stores_per_task] for i in range(0, len(stores), stores_per_task)]
+    frames = [df[df[store_column].isin(group)] for group in groups]
+    forecast_params = {"start_date": start_date, "end_date": end_date, **forecast_params}
+    task = partial(_forecast_group, forecast_params=forecast_params, store_column=store_column)
+    results = run_parallel(task, frames, workers=workers, keys=groups)
+    return _combine(results)
@@ -0,0 +1,44 @@
+# sales_forecast/plotting.py
+
+import pandas as pd
+
+
+def plot_forecast(history_df, forecast_df, path=None):
+    """
+    График фактических продаж и прогноза.
+
+    Args:
+        history_df (pd.DataFrame): История с колонками 'date', 'total_sales'.
+        forecast_df (pd.DataFrame): Прогноз с колонками 'Дата', 'Общая сумма продаж'.
+        path: Файл для сохранения (png, svg, pdf...). Если задан, график рисуется без окна
+            через backend Agg; иначе открывается окно matplotlib (блокирующий plt.show()).
+    """
+    historical_sales = history_df.groupby("date")["total_sales"].sum()
+    forecast_days = pd.to_datetime(forecast_df["Дата"])
+    forecast_sales = forecast_df["Общая сумма продаж"]
+    years = sorted(forecast_days.dt.year.unique())
+    period = str(years[0]) if len(years) == 1 else f"{years[0]}-{years[-1]}"
+
+    if path is not None:
+        # Без pyplot: фигура не регистрируется в GUI-менеджере и не требует дисплея
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        figure = Figure(figsize=(12, 5))
+        FigureCanvasAgg(figure)
+    else:
+        import matplotlib.pyplot as plt
+        figure = plt.figure(figsize=(12, 5))
+
+    ax = figure.add_subplot()
+    ax.plot(historical_sales.index, historical_sales.values, label="Фактические данные", marker="o")
+    ax.plot(forecast_days, forecast_sales.values, label=f"Прогноз {period}", marker="o", linestyle="dashed")
+    ax.set_xlabel("Дата")
+    ax.set_ylabel("Общая сумма продаж")
+    ax.set_title(f"Динамика продаж (История и Прогноз {period})")
+    ax.legend()
+    ax.grid()
+
+    if path is not None:
+        figure.savefig(path)
+    else:
+        plt.show()
@@ -0,0 +1,145 @@
+# sales_forecast/receipts.py
+"""
+Потоковая загрузка сырых выгрузок чеков (CSV, одна строка - один чек) в дневные агрегаты.
+
+Файл читается частями по chunksize строк, каждая часть сразу сворачивается до строк
+(магазин, день) с числом чеков и суммой продаж, а частичные агрегаты складываются.
+Память ограничена размером части плюс числом пар (магазин, день), а не размером файла.
+Несколько файлов обрабатываются в пуле процессов (см. parallel.run_parallel), их частичные
+агрегаты объединяются так же, поэтому один день может быть разнесен по разным файлам.
+
+Результат finalize_daily имеет колонки 'date', 'checks', 'avg_check', 'total_sales'
+(и store_column) и передается прямо в SalesForecaster или BatchForecaster.
+"""
+
+import logging
+from functools import partial
+
+import numpy as np
+import pandas as pd
+
+from sales_forecast.parallel import run_parallel
+
+logger = logging.getLogger(__name__)
+
+# Строк CSV в одной части: ~100 МБ памяти на часть при нескольких коротких столбцах
+DEFAULT_CHUNKSIZE = 1_000_000
+
+
+def iter_receipt_chunks(file_path, date_column="date", amount_column="amount", store_column=None,
+                        chunksize=DEFAULT_CHUNKSIZE, sep=",", decimal=".", encoding="utf-8"):
+    """
+    Читает выгрузку чеков частями; из файла берутся только нужные столбцы.
+
+    Yields:
+        pd.DataFrame: Часть файла со столбцами date_column, amount_column (и store_column).
+    """
+    columns = [date_column, amount_column] + ([store_column] if store_column else [])
+    dtype = {date_column: str, amount_column: np.float64}
+    if store_column:
+        dtype[store_column] = str
+    reader = pd.read_csv(
+        file_path, usecols=columns, dtype=dtype, sep=sep, decimal=decimal, encoding=encoding, chunksize=chunksize
+    )
+    with reader:
+        yield from reader
+
+
+def aggregate_chunk(chunk, date_column="date", amount_column="amount", store_column=None, date_format=None):
+    """
+    Сворачивает часть выгрузки до дневных агрегатов.
+
+    Returns:
+        pd.DataFrame: Индекс ([store_column,] 'date'), колонки 'checks' и 'total_sales'.
+
+    Raises:
+        ValueError: Если в части есть нераспознанные даты.
+    """
+    dates = pd.to_datetime(chunk[date_column], format=date_format, errors="coerce")
+    if dates.isna().any():
+        examples = chunk.loc[dates.isna(), date_column].head().tolist()
+        raise ValueError(f"Некоторые даты не распознаны! Примеры: {examples}")
+
+    keys = [dates.dt.normalize().rename("date")]
+    if store_column:
+        keys.insert(0, chunk[store_column])
+    amounts = chunk[amount_column]
+    return amounts.groupby(keys, sort=False).agg(["size", "sum"]).set_axis(["checks", "total_sales"], axis=1)
+
+
+def merge_partials(partials):
+    """Складывает частичные агрегаты (по частям одного файла или по разным файлам)."""
+    partials = [partial_df for partial_df in partials if partial_df is not None and not partial_df.empty]
+    if not partials:
+        return None
+    if len(partials) == 1:
+        return partials[0]
+    merged = pd.concat(partials)
+    return merged.groupby(level=list(range(merged.index.nlevels)), sort=False).sum()
+
+
+def aggregate_receipts(file_path, date_column="date", amount_column="amount", store_column=None,
+                       chunksize=DEFAULT_CHUNKSIZE, date_format=None, **read_options):
+    """
+    Дневные агрегаты одного файла чеков (потоково, по частям).
+
+    Args:
+        file_path: Путь к CSV с чеками.
+        date_column, amount_column, store_column (str): Столбцы даты/времени чека, суммы чека и магазина.
+        chunksize (int): Строк в одной части.
+        date_format (str): Формат даты для pd.to_datetime; None - определить автоматически.
+        **read_options: sep, decimal, encoding для pd.read_csv.
+
+    Returns:
+        pd.DataFrame: Частичный агрегат (см. aggregate_chunk) или None для пустого файла.
+    """
+    merged = None
+    rows = 0
+    chunks = iter_receipt_chunks(
+        file_path, date_column, amount_column, store_column, chunksize=chunksize, **read_options
+    )
+    for chunk in chunks:
+        rows += len(chunk)
+        part = aggregate_chunk(chunk, date_column, amount_column, store_column, date_format)
+        # Сворачиваем сразу: в памяти держим только одну часть и накопленные дни
+        merged = merge_partials([merged, part])
+        logger.debug("%s: обработано %d чеков", file_path, rows)
+    return merged
+
+
+def finalize_daily(merged, store_column=None):
+    """
+    Превращает агрегат в дневную таблицу для прогноза.
+
+    Returns:
+        pd.DataFrame: Колонки ([store_column,] 'date', 'checks', 'avg_check', 'total_sales'),
+        отсортированные по магазину и дате.
+    """
+    columns = ([store_column] if store_column else []) + ["date", "checks", "avg_check", "total_sales"]
+    if merged is None:
+        return pd.DataFrame(columns=columns)
+    daily = merged.sort_index().reset_index()
+    daily["checks"] = daily["checks"].astype(np.int64)
+    daily["avg_check"] = daily["total_sales"] / daily["checks"]
+    return daily[columns]
+
+
+def ingest_receipts(file_paths, date_column="date", amount_column="amount", store_column=None,
+                    chunksize=DEFAULT_CHUNKSIZE, date_format=None, workers=None, **read_options):
+    """
+    Дневные агрегаты по нескольким файлам чеков: файлы читаются параллельно, агрегаты объединяются.
+
+    Параметры как у aggregate_receipts; workers - как в parallel.run_parallel.
+
+    Returns:
+        tuple: (дневная таблица finalize_daily, список TaskResult с ошибками). Файлы с ошибками
+        в таблицу не входят.
+    """
+    task = partial(
+        aggregate_receipts, date_column=date_column, amount_column=amount_column, store_column=store_column,
+        chunksize=chunksize, date_format=date_format, **read_options
+    )
+    results = run_parallel(task, file_paths, workers=workers)
+    failures = [result for result in results if not result.ok]
+    merged = merge_partials(result.value for result in results if result.ok)
+    return finalize_daily(merged, store_column), failures
@@ -0,0 +1,287 @@
+# sales_forecast/seasonal.py
+
+import numpy as np
+import pandas as pd
+
+from sales_forecast.data_loader import COLUMN_RENAMES
+
+# Число слотов в таблице по дням года (календарь високосного года: 29 февраля - слот 60)
+DAY_OF_YEAR_SLOTS = 366
+
+# Нижняя граница прогноза: исторический максимум по дню года, умноженный на этот коэффициент
+FLOOR_FACTOR = 1.05
+
+# Версия формата файла профиля
+PROFILE_VERSION = 1
+
+# Показатели профиля (столбцы таблиц)
+PROFILE_COLUMNS = ["checks", "avg_check", "total_sales"]
+
+
+def leap_day_of_year(dates):
+    """
+    Номер дня в календаре високосного года (1..366) для дат.
+
+    В отличие от dayofyear, в невисокосные годы дни после 28 февраля сдвигаются на 1:
+    1 марта - всегда день 61, поэтому один и тот же день месяца попадает в один слот
+    независимо от года, а 29 февраля занимает отдельный слот 60.
+    """
+    dates = pd.DatetimeIndex(dates)
+    shift = (dates.month > 2) & ~dates.is_leap_year
+    return dates.dayofyear.to_numpy() + shift.astype(int)
+
+
+def floor_from_max(table, factor=FLOOR_FACTOR):
+    """
+    Нижняя граница прогноза из таблицы максимумов по дню года (SeasonalProfile.max).
+
+    В таблице NaN - дней с таким номером в истории нет (граница 0), -inf - есть, но все значения
+    пропущены (граница -inf).
+    """
+    return np.where(np.isnan(table), 0.0, table) * factor
+
+
+class SeasonalProfile:
+    """
+    Сезонный профиль ряда (или стопки рядов): все, что корректировкам прогноза нужно из истории.
+
+    Хранит массивы вместо истории:
+    - max: максимумы checks/avg_check/total_sales по дню года, форма (366, 3);
+    - day_sums, day_counts: суммы и число непустых значений по дню года (средние по дню месяца);
+    - fifteenth_sums, fifteenth_counts, fifteenth_rows: суммы, число непустых значений и число строк
+      за 15-е число каждого месяца каждого года, форма (годы, 12, 3) / (годы, 12);
+      первый год - first_year.
+
+    Дни года считаются по календарю високосного года (leap_day_of_year). Профиль обновляется
+    новыми строками за O(новые строки) и сохраняется в .npz; при прогнозе все значения берутся
+    индексацией массивов, без группировок по истории.
+
+    Профиль многих рядов (stores задан, см. from_history со store_column) хранит те же массивы
+    с первой осью по рядам: max формы (ряды, 366, 3), fifteenth_sums формы (ряды, годы, 12, 3) и т.д.;
+    методы возвращают результаты с той же первой осью (BatchForecaster, backtest).
+    """
+
+    def __init__(self, stores=None):
+        self.stores = None if stores is None else np.asarray(stores)
+        stack = () if stores is None else (len(self.stores),)
+        self.max = np.full(stack + (DAY_OF_YEAR_SLOTS, len(PROFILE_COLUMNS)), np.nan)
+        self.day_sums = np.zeros(stack + (DAY_OF_YEAR_SLOTS, len(PROFILE_COLUMNS)))
+        self.day_counts = np.zeros(stack + (DAY_OF_YEAR_SLOTS, len(PROFILE_COLUMNS)), dtype=np.int64)
+        self.first_year = None
+        self.fifteenth_sums = np.zeros(stack + (0, 12, len(PROFILE_COLUMNS)))
+        self.fifteenth_counts = np.zeros(stack + (0, 12, len(PROFILE_COLUMNS)), dtype=np.int64)
+        self.fifteenth_rows = np.zeros(stack + (0, 12), dtype=np.int64)
+
+    @classmethod
+    def from_history(cls, data, store_column=None):
+        """
+        Профиль по истории; со store_column - профиль всех рядов таблицы (ряды по возрастанию store_column).
+        """
+        if store_column is None:
+            return cls().update(data)
+        stores = np.sort(pd.unique(data[store_column]))
+        return cls(stores).update(data, store_column)
+
+    def update(self, new_rows, store_column=None):
+        """
+        Добавляет строки истории (колонки 'date', 'checks', 'avg_check', 'total_sales').
+
+        Для профиля многих рядов store_column - столбец ряда.
+
+        Raises:
+            ValueError: Если у профиля многих рядов не передан store_column или в строках есть
+                ряды, которых нет в профиле.
+        """
+        new_rows = new_rows.rename(columns=COLUMN_RENAMES)
+        if new_rows.empty:
+            return self
+        if self.stores is not None:
+            if store_column is None:
+                raise ValueError("Для профиля многих рядов нужен столбец ряда (store_column)")
+            codes = self.store_index(new_rows[store_column])
+
+        dates = pd.DatetimeIndex(new_rows["date"])
+        values = new_rows[PROFILE_COLUMNS].to_numpy(dtype=float)
+        present = ~np.isnan(values)
+        slot = leap_day_of_year(dates) - 1
+        # Индекс строки в таблицах: (день года) или (ряд, день года)
+        day_key = (slot,) if self.stores is None else (codes, slot)
+
+        # Максимумы: пропуски считаются -inf, чтобы отличать их от дней без истории (NaN)
+        np.fmax.at(self.max, day_key, np.where(present, values, -np.inf))
+        np.add.at(self.day_sums, day_key, np.where(present, values, 0.0))
+        np.add.at(self.day_counts, day_key, present)
+
+        is_15th = dates.day == 15
+        if is_15th.any():
+            years = dates.year.to_numpy()[is_15th]
+            self._ensure_years(years.min(), years.max())
+            key = (years - self.first_year, dates.month.to_numpy()[is_15th] - 1)
+            if self.stores is not None:
+                key = (codes[is_15th],) + key
+            np.add.at(self.fifteenth_sums, key, np.where(present, values, 0.0)[is_15th])
+            np.add.at(self.fifteenth_counts, key, present[is_15th])
+            np.add.at(self.fifteenth_rows, key, 1)
+        return self
+
+    def store_index(self, stores):
+        """
+        Номера рядов профиля многих рядов для значений stores.
+
+        Raises:
+            ValueError: Если какого-то ряда нет в профиле.
+        """
+        index = pd.Index(self.stores).get_indexer(np.asarray(stores))
+        if (index < 0).any():
+            missing = pd.unique(np.asarray(stores)[index < 0])
+            raise ValueError(f"Рядов нет в профиле: {list(missing[:10])}")
+        return index
+
+    def take(self, stores):
+        """Профиль многих рядов только для stores (в их порядке); см. store_index."""
+        index = self.store_index(stores)
+        profile = SeasonalProfile(self.stores[index])
+        profile.first_year = self.first_year
+        for name in ["max", "day_sums", "day_counts", "fifteenth_sums", "fifteenth_counts", "fifteenth_rows"]:
+            setattr(profile, name, getattr(self, name)[index])
+        return profile
+
+    def floor(self, forecast_days, columns=("checks", "avg_check"), factor=FLOOR_FACTOR):
+        """
+        Нижняя граница прогноза по дням прогноза.
+
+        Returns:
+            np.ndarray: Форма ([ряды,] len(forecast_days), len(columns)); см. floor_from_max.
+        """
+        slot = leap_day_of_year(forecast_days) - 1
+        return floor_from_max(self.max[..., self._column_index(columns)], factor)[..., slot, :]
+
+    def month_day_means(self, columns=("checks", "avg_check")):
+        """Средние по дню месяца, форма ([ряды,] 366, len(columns)); NaN - нет данных."""
+        index = self._column_index(columns)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return self.day_sums[..., index] / self.day_counts[..., index]
+
+    def fifteenth_means(self, year, columns=("checks", "avg_check"), fallback=None):
+        """
+        Средние значения показателей за 15-е число каждого месяца указанного года.
+
+        Args:
+            fallback: Значения для месяцев без строк, форма (len(columns),) или (ряды, len(columns)).
+
+        Returns:
+            np.ndarray: Массив ([ряды,] 12, len(columns)); ось месяцев: индекс = месяц - 1. Месяцы без
+            строк заполняются fallback, месяцы, где все значения пропущены, - NaN.
+        """
+        index = self._column_index(columns)
+        table = np.full(self._stack_shape() + (12, len(index)), np.nan)
+        if fallback is not None:
+            table[:] = np.asarray(fallback, dtype=float)[..., None, :]
+        year_index = self._year_index(year)
+        if year_index is None:
+            return table
+        rows = self.fifteenth_rows[..., year_index, :] > 0
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = (self.fifteenth_sums[..., year_index, :, :][..., index]
+                     / self.fifteenth_counts[..., year_index, :, :][..., index])
+        table[rows] = means[rows]
+        return table
+
+    def fifteenth_sums_for(self, year, column="total_sales"):
+        """Суммы показателя за 15-е число каждого месяца года, форма ([ряды,] 12); 0 - нет данных."""
+        year_index = self._year_index(year)
+        if year_index is None:
+            return np.zeros(self._stack_shape() + (12,))
+        return self.fifteenth_sums[..., year_index, :, PROFILE_COLUMNS.index(column)].copy()
+
+    def last_year_fifteenth_means(self, dates, columns=("checks", "avg_check"), fallback=None):
+        """
+        Средние за 15-е число того же месяца прошлого года для каждой даты (опорный год - год даты - 1).
+
+        Returns:
+            np.ndarray: Форма ([ряды,] len(dates), len(columns)); см. fifteenth_means.
+        """
+        dates = pd.DatetimeIndex(dates)
+        years = dates.year.to_numpy() - 1
+        months = dates.month.to_numpy() - 1
+        values = np.empty(self._stack_shape() + (len(dates), len(columns)))
+        for year in np.unique(years):
+            block = years == year
+            values[..., block, :] = self.fifteenth_means(year, columns, fallback)[..., months[block], :]
+        return values
+
+    def last_year_fifteenth_sums(self, dates, column="total_sales"):
+        """Суммы показателя за 15-е число того же месяца прошлого года, форма ([ряды,] len(dates))."""
+        dates = pd.DatetimeIndex(dates)
+        years = dates.year.to_numpy() - 1
+        months = dates.month.to_numpy() - 1
+        sums = np.empty(self._stack_shape() + (len(dates),))
+        for year in np.unique(years):
+            block = years == year
+            sums[..., block] = self.fifteenth_sums_for(year, column)[..., months[block]]
+        return sums
+
+    def to_arrays(self):
+        """Массивы профиля для np.savez (см. save и incremental.IncrementalForecaster.save)."""
+        return {
+            "version": PROFILE_VERSION,
+            "max": self.max,
+            "day_sums": self.day_sums,
+            "day_counts": self.day_counts,
+            "first_year": -1 if self.first_year is None else self.first_year,
+            "fifteenth_sums": self.fifteenth_sums,
+            "fifteenth_counts": self.fifteenth_counts,
+            "fifteenth_rows": self.fifteenth_rows,
+            # Подписи рядов сохраняются без pickle: строки - как массив str
+            **({} if self.stores is None else {"stores": np.asarray(self.stores.tolist())}),
+        }
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        if int(arrays["version"]) != PROFILE_VERSION:
+            raise ValueError(f"Неподдерживаемая версия профиля: {int(arrays['version'])}")
+        profile = cls(arrays["stores"] if "stores" in arrays else None)
+        profile.max = np.array(arrays["max"])
+        profile.day_sums = np.array(arrays["day_sums"])
+        profile.day_counts = np.array(arrays["day_counts"])
+        first_year = int(arrays["first_year"])
+        profile.first_year = None if first_year < 0 else first_year
+        profile.fifteenth_sums = np.array(arrays["fifteenth_sums"])
+        profile.fifteenth_counts = np.array(arrays["fifteenth_counts"])
+        profile.fifteenth_rows = np.array(arrays["fifteenth_rows"])
+        return profile
+
+    def save(self, path):
+        np.savez(path, **self.to_arrays())
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls.from_arrays(data)
+
+    def _column_index(self, columns):
+        return [PROFILE_COLUMNS.index(column) for column in columns]
+
+    def _stack_shape(self):
+        return () if self.stores is None else (len(self.stores),)
+
+    def _n_years(self):
+        return self.fifteenth_rows.shape[-2]
+
+    def _year_index(self, year):
+        if self.first_year is None or not 0 <= year - self.first_year < self._n_years():
+            return None
+        return year - self.first_year
+
+    def _ensure_years(self, first, last):
+        # Расширяет таблицы 15-х чисел на годы first..last
+        first = first if self.first_year is None else min(first, self.first_year)
+        last = last if self.first_year is None else max(last, self.first_year + self._n_years() - 1)
+        before = 0 if self.first_year is None else self.first_year - first
+        after = last - first + 1 - before - self._n_years()
+        if before or after:
+            pad = ((0, 0),) * len(self._stack_shape()) + ((before, after), (0, 0))
+            self.fifteenth_sums = np.pad(self.fifteenth_sums, pad + ((0, 0),))
+            self.fifteenth_counts = np.pad(self.fifteenth_counts, pad + ((0, 0),))
+            self.fifteenth_rows = np.pad(self.fifteenth_rows, pad)
+        self.first_year = int(first)
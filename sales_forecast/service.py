@@ -0,0 +1,466 @@
+# sales_forecast/service.py
+"""
+Локальный HTTP-сервис прогноза (asyncio, только стандартная библиотека + зависимости пакета).
+
+    python -m sales_forecast.service --port 8765 --workers 4
+
+Запросы:
+    GET  /health                     - проверка работы и статистика кэша
+    POST /datasets                   - сохранить историю (JSON или CSV), ответ {"key": ..., "rows": ...}
+    POST /forecast?format=json|csv|arrow
+         тело JSON: {"history": [...] | "dataset": ключ, "start": "2025-01-01", "end": ... | "horizon": 365,
+                     "min_avg_check", "max_avg_check", "floor_factor", "n_boot", "seed", "model"}
+         или тело CSV с историей и параметрами в строке запроса.
+
+История - колонки 'date', 'checks', 'avg_check', 'total_sales' (или заголовки выгрузки).
+Обучение выполняется в пуле процессов, чтобы цикл событий оставался отзывчивым.
+Кэши (LRU) по хэшу данных и параметрам:
+- обученные модели с сезонным профилем - по данным, min_avg_check, max_avg_check и model:
+  запрос с другим периодом, floor_factor или бутстрэпом строит прогноз без повторного обучения;
+- готовые прогнозы - по модели и параметрам периода;
+- тела ответов - по прогнозу и формату: повторный запрос отдается без сериализации.
+Одинаковые одновременные обучения считаются один раз.
+"""
+
+import argparse
+import asyncio
+import copy
+import hashlib
+import io
+import json
+import logging
+import signal
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+import pandas as pd
+
+from sales_forecast.data_loader import COLUMN_RENAMES
+from sales_forecast.forecast import FLOOR_FACTOR, MAX_AVG_CHECK, MIN_AVG_CHECK, SalesForecaster
+from sales_forecast.models import DEFAULT_MODEL, MODELS
+from sales_forecast.seasonal import SeasonalProfile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PORT = 8765
+
+# Ограничение размера тела запроса
+MAX_BODY_BYTES = 64 * 1024 ** 2
+
+# Наибольшее число повторов бутстрэпа в запросе: память и время растут линейно по n_boot
+MAX_BOOT = 5000
+
+CONTENT_TYPES = {
+    "json": "application/json; charset=utf-8",
+    "csv": "text/csv; charset=utf-8",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+# Параметры прогноза, которые принимает сервис, и их типы
+FORECAST_PARAMS = {
+    "min_avg_check": float,
+    "max_avg_check": float,
+    "floor_factor": float,
+    "n_boot": int,
+    "seed": int,
+    "model": str,
+}
+
+# Параметры обучения модели; остальные (floor_factor, n_boot, seed) влияют только на прогноз периода
+FIT_PARAMS = ("min_avg_check", "max_avg_check", "model")
+
+HISTORY_COLUMNS = ["date", "checks", "avg_check", "total_sales"]
+
+
+class RequestError(Exception):
+    """Ошибка запроса: текст уходит клиенту с указанным HTTP-статусом."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+class LRUCache:
+    """Словарь ограниченного размера: при переполнении удаляется давно не использованный элемент."""
+
+    def __init__(self, max_items):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        if key not in self.items:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.items.move_to_end(key)
+        return self.items[key]
+
+    def put(self, key, value):
+        self.items[key] = value
+        self.items.move_to_end(key)
+        while len(self.items) > self.max_items:
+            self.items.popitem(last=False)
+
+    def stats(self):
+        return {"items": len(self.items), "hits": self.hits, "misses": self.misses}
+
+
+def history_key(df):
+    """Хэш содержимого истории: одинаковые данные дают один ключ независимо от формы запроса."""
+    digest = hashlib.sha256()
+    digest.update(",".join(df.columns).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def parse_history(records=None, csv_text=None):
+    """
+    История из JSON (список записей или словарь столбцов) или текста CSV.
+
+    Raises:
+        RequestError: Если нет нужных столбцов или даты не распознаны.
+    """
+    try:
+        df = pd.read_csv(io.StringIO(csv_text)) if csv_text is not None else pd.DataFrame(records)
+    except (ValueError, TypeError, pd.errors.ParserError) as e:
+        raise RequestError(f"Не удалось прочитать историю: {e}")
+    df = df.rename(columns=COLUMN_RENAMES)
+    missing_columns = [column for column in HISTORY_COLUMNS if column not in df.columns]
+    if missing_columns:
+        raise RequestError(f"Отсутствуют столбцы: {missing_columns}")
+    df = df[HISTORY_COLUMNS].copy()
+    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    if df["date"].isna().any() or df.empty:
+        raise RequestError("История пустая или некоторые даты не распознаны")
+    for column in HISTORY_COLUMNS[1:]:
+        df[column] = pd.to_numeric(df[column], errors="coerce")
+    return df.sort_values("date", kind="stable").reset_index(drop=True)
+
+
+def fit_forecaster(history, fit_params):
+    """Выполняется в процессе пула: обучение модели и сезонный профиль одного ряда."""
+    forecaster = SalesForecaster(history)
+    if forecaster.fit(**fit_params) is None:
+        raise ValueError("Прогноз не построен: нет данных для обучения")
+    forecaster.profile = SeasonalProfile.from_history(forecaster.df)
+    # Для прогноза по обученной модели история не нужна - в кэше моделей ее не храним
+    forecaster.df = None
+    return forecaster
+
+
+def run_forecast(forecaster, start_date, end_date, horizon_params):
+    """Прогноз обученной модели на период (floor_factor, n_boot, seed)."""
+    # Копия, чтобы кэшированная модель не держала последний прогноз в forecast_df
+    return copy.copy(forecaster).predict(start_date, end_date, **horizon_params)
+
+
+def forecast_keys(data_key, start_date, end_date, params):
+    """Ключи кэшей: (ключ обученной модели, ключ прогноза периода)."""
+    fit_params = tuple(sorted((name, value) for name, value in params.items() if name in FIT_PARAMS))
+    horizon_params = tuple(sorted((name, value) for name, value in params.items() if name not in FIT_PARAMS))
+    model_key = (data_key, fit_params)
+    return model_key, (model_key, str(start_date.date()), str(end_date.date()), horizon_params)
+
+
+def serialize(forecast_df, fmt):
+    """Прогноз в байты ответа: json (записи), csv или поток Arrow IPC (нужен pyarrow)."""
+    if fmt == "json":
+        return forecast_df.to_json(orient="records", force_ascii=False).encode("utf-8")
+    if fmt == "csv":
+        return forecast_df.to_csv(index=False).encode("utf-8")
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise RequestError("Формат arrow недоступен: не установлен pyarrow")
+    table = pa.Table.from_pandas(forecast_df, preserve_index=False)
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, table.schema) as stream:
+        stream.write_table(table)
+    return sink.getvalue()
+
+
+class ForecastService:
+    """
+    HTTP-сервис прогноза поверх asyncio.start_server.
+
+    Args:
+        workers (int): Процессов для обучения; None - по числу ядер.
+        cache_size (int): Сколько записей хранить в каждом LRU-кэше (модели, прогнозы, ответы).
+        datasets_size (int): Сколько загруженных историй хранить по ключу.
+    """
+
+    def __init__(self, workers=None, cache_size=256, datasets_size=64):
+        self.executor = ProcessPoolExecutor(max_workers=workers)
+        self.models = LRUCache(cache_size)
+        self.forecasts = LRUCache(cache_size)
+        self.responses = LRUCache(cache_size)
+        self.datasets = LRUCache(datasets_size)
+        self.in_flight = {}
+        self.server = None
+
+    async def start(self, host="127.0.0.1", port=DEFAULT_PORT):
+        self.server = await asyncio.start_server(self._handle_connection, host, port)
+        return self.server
+
+    async def serve_forever(self, host="127.0.0.1", port=DEFAULT_PORT):
+        server = await self.start(host, port)
+        logger.info("Сервис прогноза: http://%s:%s", host, port)
+        # SIGTERM завершает сервис штатно: close() останавливает и процессы пула
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        try:
+            loop.add_signal_handler(signal.SIGTERM, stop.set)
+        except NotImplementedError:
+            # Windows: обработчики сигналов в цикле событий не поддерживаются, остается Ctrl+C
+            logger.debug("Обработчик SIGTERM недоступен на этой платформе")
+        async with server:
+            await stop.wait()
+
+    def close(self):
+        if self.server is not None:
+            self.server.close()
+        self.executor.shutdown(cancel_futures=True)
+
+    async def forecast(self, history, start_date, end_date, params, data_key=None):
+        """
+        Прогноз из кэша; модель обучается в пуле процессов, только если ее нет в кэше моделей.
+
+        data_key - готовый history_key(history) (для загруженных наборов данных).
+
+        Returns:
+            tuple: (прогноз, True - прогноз взят из кэша).
+        """
+        data_key = data_key or history_key(history)
+        model_key, key = forecast_keys(data_key, start_date, end_date, params)
+        cached = self.forecasts.get(key)
+        if cached is not None:
+            return cached, True
+
+        forecaster = self.models.get(model_key)
+        if forecaster is None:
+            fit_params = {name: params[name] for name in FIT_PARAMS if name in params}
+            forecaster = await self._run_once(("fit", model_key), fit_forecaster, history, fit_params)
+            self.models.put(model_key, forecaster)
+
+        horizon_params = {name: value for name, value in params.items() if name not in FIT_PARAMS}
+        if horizon_params.get("n_boot"):
+            # Бутстрэп - сотни повторов тренда: считаем в пуле, чтобы не блокировать цикл событий
+            forecast_df = await self._run_once(
+                ("forecast", key), run_forecast, forecaster, start_date, end_date, horizon_params
+            )
+        else:
+            # Прогноз по готовой модели - миллисекунды: на месте, без передачи модели в процесс пула
+            forecast_df = run_forecast(forecaster, start_date, end_date, horizon_params)
+        self.forecasts.put(key, forecast_df)
+        return forecast_df, False
+
+    async def response(self, history, start_date, end_date, params, fmt, data_key=None):
+        """
+        Тело ответа с прогнозом в формате fmt; сериализованные прогнозы кэшируются по формату.
+
+        Returns:
+            tuple: (байты ответа, True - прогноз или ответ взят из кэша).
+        """
+        data_key = data_key or history_key(history)
+        _, key = forecast_keys(data_key, start_date, end_date, params)
+        payload = self.responses.get((key, fmt))
+        if payload is not None:
+            return payload, True
+        forecast_df, cached = await self.forecast(history, start_date, end_date, params, data_key)
+        payload = serialize(forecast_df, fmt)
+        self.responses.put((key, fmt), payload)
+        return payload, cached
+
+    async def _run_once(self, key, func, *args):
+        """Выполняет func в пуле процессов; одинаковые одновременные вызовы (по key) ждут один результат."""
+        if key in self.in_flight:
+            return await asyncio.shield(self.in_flight[key])
+        future = asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+        self.in_flight[key] = future
+        try:
+            return await future
+        finally:
+            del self.in_flight[key]
+
+    async def dispatch(self, method, target, headers, body):
+        """Обрабатывает запрос; возвращает (статус, тип содержимого, тело, доп. заголовки)."""
+        url = urlsplit(target)
+        query = dict(parse_qsl(url.query))
+
+        if url.path == "/health":
+            payload = {"status": "ok", "models": self.models.stats(), "forecasts": self.forecasts.stats(),
+                       "responses": self.responses.stats(), "datasets": self.datasets.stats()}
+            return 200, CONTENT_TYPES["json"], _json_bytes(payload), {}
+
+        if method != "POST":
+            raise RequestError("Ожидается POST", status=405)
+
+        options, history = self._read_body(headers, body, query)
+
+        if url.path == "/datasets":
+            if history is None:
+                raise RequestError("Нет истории в запросе")
+            key = history_key(history)
+            self.datasets.put(key, history)
+            return 200, CONTENT_TYPES["json"], _json_bytes({"key": key, "rows": len(history)}), {}
+
+        if url.path != "/forecast":
+            raise RequestError(f"Неизвестный путь: {url.path}", status=404)
+
+        data_key = None
+        if history is None:
+            if "dataset" not in options:
+                raise RequestError("Нужна история ('history' или тело CSV) или ключ 'dataset'")
+            data_key = options["dataset"]
+            history = self.datasets.get(data_key)
+            if history is None:
+                raise RequestError(f"Набор данных не найден: {data_key}", status=404)
+
+        fmt = options.get("format", "json")
+        if fmt not in CONTENT_TYPES:
+            raise RequestError(f"Неизвестный формат: {fmt}")
+        start_date, end_date = _forecast_period(options, history)
+        params = _forecast_params(options)
+
+        payload, cached = await self.response(history, start_date, end_date, params, fmt, data_key)
+        return 200, CONTENT_TYPES[fmt], payload, {"X-Cache": "hit" if cached else "miss"}
+
+    def _read_body(self, headers, body, query):
+        content_type = headers.get("content-type", "application/json").split(";")[0].strip()
+        if content_type == "text/csv":
+            return query, parse_history(csv_text=body.decode("utf-8"))
+        try:
+            options = json.loads(body) if body else {}
+        except ValueError as e:
+            raise RequestError(f"Некорректный JSON: {e}")
+        if not isinstance(options, dict):
+            raise RequestError("Тело запроса должно быть объектом JSON")
+        options = {**query, **options}
+        history = options.pop("history", None)
+        return options, parse_history(records=history) if history is not None else None
+
+    async def _handle_connection(self, reader, writer):
+        # HTTP/1.1 с keep-alive: соединение обслуживает запросы, пока клиент его не закроет
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0) or 0)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if length > MAX_BODY_BYTES:
+                    error = RequestError("Слишком большой запрос", status=413)
+                    await self._respond(writer, error.status, CONTENT_TYPES["json"], _error_bytes(error), {}, False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+
+                try:
+                    status, content_type, payload, extra = await self.dispatch(method, target, headers, body)
+                except RequestError as e:
+                    status, content_type, payload, extra = e.status, CONTENT_TYPES["json"], _error_bytes(e), {}
+                except Exception as e:
+                    logger.exception("Ошибка обработки запроса %s %s", method, target)
+                    status, content_type, payload, extra = 500, CONTENT_TYPES["json"], _error_bytes(e), {}
+                await self._respond(writer, status, content_type, payload, extra, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, content_type, payload, extra, keep_alive):
+        head = [
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(payload)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}",
+        ]
+        head.extend(f"{name}: {value}" for name, value in extra.items())
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+        await writer.drain()
+
+
+def _json_bytes(payload):
+    return json.dumps(payload, ensure_ascii=False).encode("utf-8")
+
+
+def _error_bytes(error):
+    return _json_bytes({"error": str(error)})
+
+
+def _forecast_period(options, history):
+    # По умолчанию прогноз начинается на следующий день после истории
+    try:
+        if options.get("start"):
+            start_date = pd.Timestamp(options["start"])
+        else:
+            start_date = history["date"].max() + pd.Timedelta(days=1)
+        if options.get("end"):
+            end_date = pd.Timestamp(options["end"])
+        else:
+            end_date = start_date + pd.Timedelta(days=int(options.get("horizon", 365)) - 1)
+    except ValueError as e:
+        raise RequestError(f"Некорректный период прогноза: {e}")
+    if end_date < start_date:
+        raise RequestError("Конец периода прогноза раньше начала")
+    return start_date.normalize(), end_date.normalize()
+
+
+def _forecast_params(options):
+    params = {"min_avg_check": MIN_AVG_CHECK, "max_avg_check": MAX_AVG_CHECK, "floor_factor": FLOOR_FACTOR,
+              "model": DEFAULT_MODEL}
+    for name, cast in FORECAST_PARAMS.items():
+        if options.get(name) is not None:
+            try:
+                params[name] = cast(options[name])
+            except (TypeError, ValueError):
+                raise RequestError(f"Некорректное значение параметра {name}: {options[name]}")
+    if not 0 <= params.get("n_boot", 0) <= MAX_BOOT:
+        raise RequestError(f"n_boot должен быть от 0 до {MAX_BOOT}: {params['n_boot']}")
+    if params["model"] not in MODELS:
+        raise RequestError(f"Неизвестная модель: {params['model']}. Доступны: {', '.join(sorted(MODELS))}")
+    return params
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m sales_forecast.service", description="Локальный сервис прогноза.")
+    parser.add_argument("--host", default="127.0.0.1", help="Адрес (по умолчанию только localhost)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=0, help="Процессов для обучения (0 - по числу ядер)")
+    parser.add_argument("--cache-size", type=int, default=256, help="Записей в каждом LRU-кэше")
+    parser.add_argument("--log-level", default="INFO", choices=["DEBUG", "INFO", "WARNING", "ERROR"])
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format="%(asctime)s %(name)s %(levelname)s %(message)s")
+    service = ForecastService(workers=args.workers or None, cache_size=args.cache_size)
+    try:
+        asyncio.run(service.serve_forever(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+# sales_forecast/trend.py
+
+from functools import partial
+
+import numpy as np
+
+# Масштаб номера дня: регрессия строится по годам, а не по дням,
+# чтобы степени x^4 в нормальных уравнениях оставались в разумном диапазоне
+DAY_SCALE = 365.0
+
+# Порог числа обусловленности X^T X: выше него ряд решается через псевдообратную
+# (у полинома 2-й степени по 3 дням - около 1e11, по 2 дням - около 1e24)
+MAX_CONDITION = 1e12
+
+
+def design_matrix(day_numbers, degree=2):
+    """Матрица признаков [1, x, x^2, ...] для полиномиального тренда (x - номер дня / DAY_SCALE)."""
+    x = np.asarray(day_numbers, dtype=float) / DAY_SCALE
+    return x[..., None] ** np.arange(degree + 1)
+
+
+def normal_equations(day_numbers, targets, groups=None, n_groups=1, degree=2):
+    """
+    Накопители нормальных уравнений X^T X и X^T y для нескольких рядов сразу.
+
+    Args:
+        day_numbers (np.ndarray): Номера дней, форма (n,).
+        targets (np.ndarray): Значения целевых показателей, форма (n, k).
+        groups (np.ndarray): Код ряда (0..n_groups-1) для каждой строки; None - один ряд.
+        n_groups (int): Число рядов.
+        degree (int): Степень полинома.
+
+    Returns:
+        tuple: (xtx формы (n_groups, d, d), xty формы (n_groups, d, k)), где d = degree + 1.
+    """
+    x = np.asarray(day_numbers, dtype=float) / DAY_SCALE
+    targets = np.asarray(targets, dtype=float).reshape(len(x), -1)
+    if groups is None:
+        groups = np.zeros(len(x), dtype=np.intp)
+    d = degree + 1
+
+    # Моменты x^0..x^(2*degree) по каждому ряду: из них собирается X^T X (матрица Ганкеля)
+    powers = x[:, None] ** np.arange(2 * degree + 1)
+    moments = np.stack(
+        [np.bincount(groups, weights=powers[:, p], minlength=n_groups) for p in range(2 * degree + 1)],
+        axis=1
+    )
+    xtx = moments[:, np.arange(d)[:, None] + np.arange(d)[None, :]]
+    xty = np.stack(
+        [
+            np.stack(
+                [np.bincount(groups, weights=powers[:, p] * targets[:, j], minlength=n_groups)
+                 for j in range(targets.shape[1])],
+                axis=1
+            )
+            for p in range(d)
+        ],
+        axis=1
+    )
+    return xtx, xty
+
+
+def feature_normal_equations(features, targets, groups=None, n_groups=1):
+    """
+    Накопители X^T X и X^T y по готовой матрице признаков (для моделей, не сводящихся к степеням x).
+
+    Args:
+        features (np.ndarray): Признаки, форма (n, d).
+        targets (np.ndarray): Значения целевых показателей, форма (n, k).
+        groups (np.ndarray): Код ряда для каждой строки; None - один ряд.
+        n_groups (int): Число рядов.
+
+    Returns:
+        tuple: (xtx формы (n_groups, d, d), xty формы (n_groups, d, k)).
+    """
+    features = np.asarray(features, dtype=float)
+    targets = np.asarray(targets, dtype=float).reshape(len(features), -1)
+    if groups is None:
+        return (features.T @ features)[None], (features.T @ targets)[None]
+
+    # Одна сумма по рядам на каждую пару признаков (матрица симметрична) и пару признак-показатель
+    d = features.shape[1]
+    xtx = np.empty((n_groups, d, d))
+    for i in range(d):
+        for j in range(i, d):
+            xtx[:, i, j] = xtx[:, j, i] = np.bincount(
+                groups, weights=features[:, i] * features[:, j], minlength=n_groups
+            )
+    xty = np.stack(
+        [
+            np.stack(
+                [np.bincount(groups, weights=features[:, i] * targets[:, j], minlength=n_groups)
+                 for j in range(targets.shape[1])],
+                axis=1
+            )
+            for i in range(d)
+        ],
+        axis=1
+    )
+    return xtx, xty
+
+
+def solve_normal_equations(xtx, xty):
+    """
+    Решает пачку нормальных уравнений одним вызовом.
+
+    Ряды с плохо обусловленной матрицей X^T X (число обусловленности выше MAX_CONDITION: мало точек
+    для степени полинома, пустой ряд) решаются через псевдообратную с отсечением малых сингулярных
+    чисел - решение наименьшей нормы вместо огромных коэффициентов.
+
+    Args:
+        xtx (np.ndarray): Матрицы X^T X формы (d, d) или (n_groups, d, d).
+        xty (np.ndarray): Правые части формы (d, k) или (n_groups, d, k).
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        condition = np.linalg.cond(xtx)
+    ill = ~(condition <= MAX_CONDITION)
+    if not ill.any():
+        return np.linalg.solve(xtx, xty)
+    if np.ndim(xtx) == 2:
+        return np.linalg.pinv(xtx, rcond=1 / MAX_CONDITION) @ xty
+
+    coef = np.empty(np.broadcast_shapes(xtx.shape[:-2], xty.shape[:-2]) + xty.shape[-2:])
+    coef[ill] = np.linalg.pinv(xtx[ill], rcond=1 / MAX_CONDITION) @ xty[ill]
+    if not ill.all():
+        coef[~ill] = np.linalg.solve(xtx[~ill], xty[~ill])
+    return coef
+
+
+def predict(coef, day_numbers):
+    """
+    Прогноз по коэффициентам тренда.
+
+    Args:
+        coef (np.ndarray): Коэффициенты формы (..., d, k).
+        day_numbers (np.ndarray): Номера дней формы (..., h).
+
+    Returns:
+        np.ndarray: Прогноз формы (..., h, k).
+    """
+    return design_matrix(day_numbers, coef.shape[-2] - 1) @ coef
+
+
+def bootstrap_predict(day_numbers, targets, forecast_day_numbers, n_boot=1000, seed=None, degree=2, features=None):
+    """
+    Остаточный бутстрэп полиномиального тренда: n_boot повторов прогноза без цикла по повторам.
+
+    Повтор b - это тренд, обученный на y* = X b_hat + r[idx_b] (остатки, выбранные с возвращением),
+    плюс случайный остаток для каждого дня прогноза. Поправка коэффициентов повтора -
+    (X^T X)^-1 X^T r[idx_b] = sum_i h_i r[idx_b[i]], где h_i = (X^T X)^-1 x_i: выбранный остаток
+    попадает в строку i со своим весом h_i, а не в строку, из которой он взят. Все повторы
+    считаются одним пакетным умножением (d x n) @ (n_boot x n x k).
+
+    Args:
+        day_numbers (np.ndarray): Номера дней обучающих строк, форма (n,).
+        targets (np.ndarray): Значения показателей, форма (n, k).
+        forecast_day_numbers (np.ndarray): Номера дней прогноза, форма (h,).
+        n_boot (int): Число повторов.
+        seed: Зерно генератора случайных чисел (np.random.default_rng).
+        degree (int): Степень полинома.
+        features: Функция номера дней -> матрица признаков (например, models.LinearTrend.features);
+            по умолчанию полином степени degree (design_matrix).
+
+    Returns:
+        np.ndarray: Повторы прогноза формы (n_boot, h, k).
+    """
+    if features is None:
+        features = partial(design_matrix, degree=degree)
+    targets = np.asarray(targets, dtype=float).reshape(len(day_numbers), -1)
+    n, k = targets.shape
+    x = features(day_numbers)
+
+    xtx = x.T @ x
+    coef = solve_normal_equations(xtx, x.T @ targets)
+    residuals = targets - x @ coef
+    # Строка i матрицы hat: вклад значения в строке i в коэффициенты, (X^T X)^-1 x_i
+    hat = solve_normal_equations(xtx, x.T).T
+
+    rng = np.random.default_rng(seed)
+    picks = rng.integers(0, n, size=(n_boot, n))
+    # То же, что np.einsum("nd,bnk->bdk", hat, residuals[picks]), но через пакетный matmul
+    boot_coef = coef + hat.T @ residuals[picks]
+
+    forecast = features(forecast_day_numbers) @ boot_coef
+    noise = residuals[rng.integers(0, n, size=(n_boot, len(forecast_day_numbers)))]
+    return forecast + noise
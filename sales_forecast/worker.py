@@ -0,0 +1,91 @@
+# sales_forecast/worker.py
+
+import queue
+import threading
+
+
+class TaskCancelled(Exception):
+    """Задача остановлена пользователем на границе этапов."""
+
+
+class BackgroundTask:
+    """
+    Последовательность этапов, выполняемая в фоновом потоке.
+
+    Каждый этап - пара (подпись, функция): функция получает результат предыдущего этапа
+    и возвращает свой. Третьим элементом этапа можно передать словарь {подпись точки
+    проверки: доля этапа}: checkpoint(подпись) внутри функции этапа тогда двигает индикатор
+    на эту долю (см. forecast.CHECKPOINT_PROGRESS); без словаря внутренние точки проверки
+    показывают середину этапа. Поток не обращается к Tk: о ходе работы он сообщает через
+    потокобезопасную очередь, которую GUI опрашивает через root.after (см. poll()).
+    События: ("progress", (процент, подпись)), ("done", результат),
+    ("cancelled", None), ("error", исключение).
+    """
+
+    def __init__(self, stages):
+        self.stages = list(stages)
+        self.events = queue.Queue()
+        self._cancel = threading.Event()
+        self._stage_index = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def is_alive(self):
+        return self._thread.is_alive()
+
+    def checkpoint(self, label=None):
+        """
+        Граница этапа: прерывает задачу, если запрошена отмена; иначе обновляет подпись хода работы.
+
+        Передается в длинные функции (например, SalesForecaster.forecast), чтобы отмена
+        срабатывала и внутри этапа.
+        """
+        if self._cancel.is_set():
+            raise TaskCancelled()
+        if label is not None:
+            self._report(label)
+
+    def poll(self):
+        """Забирает все накопившиеся события без ожидания."""
+        events = []
+        while True:
+            try:
+                events.append(self.events.get_nowait())
+            except queue.Empty:
+                return events
+
+    def _report(self, label, done=False):
+        stage_label, _, *fractions = self.stages[self._stage_index]
+        text = stage_label if label == stage_label else f"{stage_label}: {label}"
+        if done:
+            fraction = 1
+        elif fractions:
+            fraction = fractions[0].get(label, 0)
+        else:
+            fraction = 0.5
+        percent = 100.0 * (self._stage_index + fraction) / len(self.stages)
+        self.events.put(("progress", (percent, text)))
+
+    def _run(self):
+        result = None
+        try:
+            for index, (label, func, *_) in enumerate(self.stages):
+                self._stage_index = index
+                self.checkpoint(label)
+                result = func(result)
+                self._report(label, done=True)
+            self.events.put(("done", result))
+        except TaskCancelled:
+            self.events.put(("cancelled", None))
+        except Exception as e:
+            self.events.put(("error", e))
@@ -0,0 +1,28 @@
+# tests/conftest.py
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+sys.path.insert(0, str(REPO_ROOT / "benchmarks"))
+
+from synthetic import generate_sales  # noqa: E402
+
+SALES = "Общая сумма продаж"
+
+
+@pytest.fixture
+def history():
+    """Два года истории одного магазина в формате выгрузки."""
+    return generate_sales(years=2, start="2022-03-01", seed=1)
+
+
+@pytest.fixture
+def stores_history():
+    """Три магазина с историей разной длины (store_id, формат выгрузки)."""
+    df = generate_sales(years=2, stores=3, start="2022-03-01", seed=2)
+    # Магазин store_00002 открылся позже остальных
+    late = (df["store_id"] == "store_00002") & (df["По дням"] < "2022-09-01")
+    return df[~late].reset_index(drop=True)
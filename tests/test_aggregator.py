@@ -0,0 +1,49 @@
+# tests/test_aggregator.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from sales_forecast.aggregator import ROLLUP_LEVELS, build_rollups, parse_russian_dates
+from sales_forecast.data_loader import COLUMN_RENAMES
+
+# Частоты pandas для сравнения: неделя с понедельника, месяц и год - с первого дня
+PANDAS_PERIODS = {"daily": "D", "weekly": "W-SUN", "monthly": "M", "yearly": "Y"}
+
+
+def test_parse_russian_dates():
+    values = pd.Series([
+        "1 января 2024 г.", "29 февраля 2024", "3 сент. 2023", "15 Май 2022", "2024-03-05", "05.04.2024",
+        "31 февраля 2024", "вчера", None,
+    ])
+    expected = pd.to_datetime([
+        "2024-01-01", "2024-02-29", "2023-09-03", "2022-05-15", "2024-03-05", "2024-04-05", None, None, None,
+    ])
+    pd.testing.assert_series_equal(parse_russian_dates(values), pd.Series(expected), check_dtype=False)
+
+
+def test_parse_russian_dates_keeps_datetimes():
+    dates = pd.Series(pd.to_datetime(["2024-01-01", "2024-01-02"]))
+    assert parse_russian_dates(dates) is dates
+
+
+@pytest.mark.parametrize("level", list(ROLLUP_LEVELS))
+def test_rollups_match_groupby(stores_history, level):
+    df = stores_history.rename(columns=COLUMN_RENAMES)
+    # Повтор дня и пропуск: строки одного дня складываются, NaN считается нулем
+    df = pd.concat([df, df.iloc[:3]], ignore_index=True)
+    df.loc[5, "checks"] = np.nan
+
+    rollup = build_rollups(df, levels=[level])[level]
+
+    daily = df.groupby(["store_id", "date"], as_index=False)[["checks", "total_sales"]].sum()
+    period = daily["date"].dt.to_period(PANDAS_PERIODS[level]).dt.start_time
+    expected = daily.groupby(["store_id", period.rename("period")]).agg(
+        days=("date", "size"), checks=("checks", "sum"), total_sales=("total_sales", "sum")
+    ).reset_index()
+    expected["avg_check"] = expected["total_sales"] / expected["checks"]
+    pd.testing.assert_frame_equal(rollup, expected, check_dtype=False)
+
+
+def test_unknown_level_is_rejected(history):
+    with pytest.raises(ValueError):
+        build_rollups(history, levels=["hourly"])
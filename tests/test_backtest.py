@@ -0,0 +1,57 @@
+# tests/test_backtest.py
+import numpy as np
+import pandas as pd
+
+from sales_forecast.backtest import accuracy_report, backtest, rolling_cutoffs
+from sales_forecast.batch import BatchForecaster
+from sales_forecast.data_loader import COLUMN_RENAMES
+
+HORIZON = 30
+
+
+def naive_report(df, cutoffs, floor_factor):
+    # Прогноз от каждой даты отсечения по отдельности и метрики по дням без накопления сумм
+    df = df.rename(columns=COLUMN_RENAMES)
+    rows = []
+    for cutoff in cutoffs:
+        end = cutoff + pd.Timedelta(days=HORIZON - 1)
+        forecast_df = BatchForecaster(df[df["date"] < cutoff]).forecast(cutoff, end, floor_factor=floor_factor)
+        forecast_df["date"] = pd.to_datetime(forecast_df["Дата"])
+        actual = df[(df["date"] >= cutoff) & (df["date"] <= end)]
+        merged = actual.merge(forecast_df, on=["store_id", "date"])
+        merged["bucket"] = np.where((merged["date"] - cutoff).dt.days < 7, "1-7", "8-30")
+        rows.append(merged[["store_id", "bucket", "total_sales", "Общая сумма продаж"]])
+    merged = pd.concat(rows)
+    error = merged["Общая сумма продаж"] - merged["total_sales"]
+    merged = merged.assign(error=error, abs_error=error.abs(), ape=error.abs() / merged["total_sales"])
+    grouped = merged.groupby(["store_id", "bucket"])
+    return pd.DataFrame({
+        "n": grouped.size(),
+        "mape": 100 * grouped["ape"].mean(),
+        "wape": 100 * grouped["abs_error"].sum() / grouped["total_sales"].sum(),
+        "bias": 100 * grouped["error"].sum() / grouped["total_sales"].sum(),
+    }).reset_index()
+
+
+def test_backtest_matches_naive_loop(stores_history):
+    cutoffs = rolling_cutoffs(stores_history, horizon=HORIZON, n_cutoffs=3, step_days=60)
+    assert len(cutoffs) == 3
+
+    errors, failures = backtest(
+        stores_history, cutoffs, horizon=HORIZON, buckets=(7,), workers=2, floor_factor=0.9
+    )
+    assert failures == []
+    report = accuracy_report(errors)
+    report["bucket"] = report["bucket"].astype(str)
+    pd.testing.assert_frame_equal(report, naive_report(stores_history, cutoffs, 0.9), check_dtype=False)
+
+
+def test_overall_report_and_single_series(history):
+    cutoffs = rolling_cutoffs(history, horizon=HORIZON, n_cutoffs=2)
+    errors, failures = backtest(history, cutoffs, horizon=HORIZON, workers=1)
+    assert failures == []
+    assert set(errors["store_id"]) == {"all"}
+
+    overall = accuracy_report(errors, by=())
+    assert len(overall) == 1 and overall.loc[0, "n"] == HORIZON * len(cutoffs)
+    assert np.isfinite(overall.loc[0, ["mape", "wape", "bias"]].astype(float)).all()
@@ -0,0 +1,42 @@
+# tests/test_batch.py
+import numpy as np
+import pytest
+
+from conftest import SALES
+from sales_forecast.batch import BatchForecaster
+from sales_forecast.forecast import SalesForecaster
+from sales_forecast.seasonal import SeasonalProfile
+
+COLUMNS = ["Количество чеков", "Средняя сумма чека", SALES]
+
+
+@pytest.mark.parametrize("model", ["poly", "weekly", "sklearn"])
+@pytest.mark.parametrize("period", [
+    ("2024-03-01", "2024-12-31"),
+    # Горизонт через границу года: 15-е числа 2025 года берутся из 2024 года
+    ("2024-07-01", "2025-06-30"),
+])
+def test_batch_matches_single_store_forecasts(stores_history, model, period):
+    start_date, end_date = period
+    batch = BatchForecaster(stores_history).forecast(start_date, end_date, model=model)
+
+    for store, rows in stores_history.groupby("store_id"):
+        expected = SalesForecaster(rows.drop(columns="store_id")).forecast(
+            start_date, end_date, plot=False, model=model
+        )
+        actual = batch[batch["store_id"] == store]
+        assert actual["Дата"].tolist() == expected["Дата"].tolist()
+        for column in COLUMNS:
+            np.testing.assert_allclose(actual[column].to_numpy(float), expected[column].to_numpy(float), rtol=1e-7)
+
+
+def test_batch_with_shared_profile(stores_history):
+    profile = SeasonalProfile.from_history(stores_history, store_column="store_id")
+    expected = BatchForecaster(stores_history).forecast("2024-03-01", "2024-12-31")
+
+    subset = stores_history[stores_history["store_id"] != "store_00000"]
+    actual = BatchForecaster(subset).forecast("2024-03-01", "2024-12-31", profile=profile)
+
+    np.testing.assert_allclose(
+        actual[SALES].to_numpy(), expected.loc[expected["store_id"] != "store_00000", SALES].to_numpy(), rtol=1e-12
+    )
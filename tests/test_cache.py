@@ -0,0 +1,98 @@
+# tests/test_cache.py
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from sales_forecast import cache as cache_module
+from sales_forecast.cache import FrameCache, file_digest
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "sales.csv"
+    path.write_text("a,b\n1,x\n2,y\n", encoding="utf-8")
+    return path
+
+
+class CountingLoader:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        return pd.read_csv(file_path)
+
+
+def test_hit_returns_cached_frame(tmp_path, source):
+    cache = FrameCache(tmp_path / "cache")
+    loader = CountingLoader()
+    first = cache.get_or_load(source, loader, namespace="test")
+    second = cache.get_or_load(source, loader, namespace="test")
+    assert loader.calls == 1
+    pd.testing.assert_frame_equal(first, second)
+    # Другой загрузчик того же файла - своя запись
+    cache.get_or_load(source, loader, namespace="other")
+    assert loader.calls == 2
+
+
+def test_invalidate_and_changed_file_miss(tmp_path, source):
+    cache = FrameCache(tmp_path / "cache")
+    loader = CountingLoader()
+    cache.get_or_load(source, loader, namespace="test")
+    assert cache.invalidate(source, namespace="test") == 1
+    cache.get_or_load(source, loader, namespace="test")
+    assert loader.calls == 2
+
+    source.write_text("a,b\n3,z\n", encoding="utf-8")
+    df = cache.get_or_load(source, loader, namespace="test")
+    assert loader.calls == 3
+    assert df["a"].tolist() == [3]
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = FrameCache(tmp_path / "cache")
+    loader = CountingLoader()
+    paths = []
+    for i in range(3):
+        path = tmp_path / f"{i}.csv"
+        path.write_text("a\n" + "\n".join(str(i * 1000 + j) for j in range(200)), encoding="utf-8")
+        paths.append(path)
+        cache.get_or_load(path, loader, namespace="test")
+        entry = cache.cache_dir / cache.key(path, "test")
+        os.utime(entry / "meta.json", (i, i))
+    keep = [cache.cache_dir / cache.key(path, "test") for path in (paths[0], paths[2])]
+
+    # Обращение к первой записи делает ее самой свежей; лимит на две записи вытесняет вторую
+    cache.get_or_load(paths[0], loader, namespace="test")
+    cache.max_bytes = sum(cache_module._entry_size(entry) for entry in keep)
+    cache._evict()
+    remaining = {entry.name for entry in cache._entries()}
+    assert remaining == {cache.key(paths[0], "test"), cache.key(paths[2], "test")}
+
+
+def test_feather_entry_without_pyarrow_is_a_miss(tmp_path, source, monkeypatch):
+    cache = FrameCache(tmp_path / "cache")
+    entry = cache.cache_dir / cache.key(source, "test")
+    entry.mkdir(parents=True)
+    (entry / "frame.feather").write_bytes(b"")
+    (entry / "meta.json").write_text(json.dumps({"format": "feather", "columns": []}), encoding="utf-8")
+    monkeypatch.setattr(cache_module, "_feather", lambda: None)
+
+    loader = CountingLoader()
+    df = cache.get_or_load(source, loader, namespace="test")
+    assert loader.calls == 1 and df["a"].tolist() == [1, 2]
+    # Запись перезаписана в .npy и дальше читается без pyarrow
+    cache.get_or_load(source, loader, namespace="test")
+    assert loader.calls == 1
+
+
+def test_file_digest_is_memoized_until_file_changes(source):
+    cache_module._file_digest.cache_clear()
+    digest = file_digest(source)
+    assert file_digest(source) == digest
+    assert cache_module._file_digest.cache_info().misses == 1
+
+    source.write_text("a,b\n", encoding="utf-8")
+    assert file_digest(source) != digest
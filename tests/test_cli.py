@@ -0,0 +1,41 @@
+# tests/test_cli.py
+import json
+
+import pandas as pd
+
+from sales_forecast.cli import main
+from sales_forecast.data_loader import read_sales_excel
+from sales_forecast.forecast import SalesForecaster
+from synthetic import write_export
+
+
+def test_csv_smoke(tmp_path, history, stores_history, capsys):
+    write_export(history, tmp_path / "single.xlsx")
+    write_export(stores_history, tmp_path / "stores.xlsx")
+    output_dir = tmp_path / "out"
+    metrics_path = tmp_path / "metrics.json"
+
+    code = main([
+        str(tmp_path / "*.xlsx"), "-o", str(output_dir), "--format", "csv", "--no-cache",
+        "--start", "2024-03-01", "--horizon", "31", "--metrics-json", str(metrics_path),
+    ])
+    assert code == 0
+    assert "Готово: 2 из 2" in capsys.readouterr().out
+
+    single = pd.read_csv(output_dir / "single_forecast.csv", dtype={"Дата": str})
+    expected = SalesForecaster(read_sales_excel(tmp_path / "single.xlsx")).forecast(
+        "2024-03-01", "2024-03-31", plot=False
+    )
+    pd.testing.assert_frame_equal(single, expected, check_dtype=False)
+
+    stores = pd.read_csv(output_dir / "stores_forecast.csv")
+    assert sorted(stores["store_id"].unique()) == sorted(stores_history["store_id"].unique())
+    assert len(stores) == 31 * stores_history["store_id"].nunique()
+
+    metrics = json.loads(metrics_path.read_text(encoding="utf-8"))
+    assert set(metrics) == {str(tmp_path / "single.xlsx"), str(tmp_path / "stores.xlsx")}
+
+
+def test_missing_file_fails(tmp_path, capsys):
+    assert main([str(tmp_path / "missing.xlsx"), "-o", str(tmp_path), "--format", "csv", "--no-cache"]) == 1
+    assert "ОШИБКА" in capsys.readouterr().err
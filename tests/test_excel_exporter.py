@@ -0,0 +1,51 @@
+# tests/test_excel_exporter.py
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from sales_forecast.excel_exporter import ExcelExporter
+
+
+@pytest.fixture
+def forecast_df():
+    return pd.DataFrame({
+        "Дата": pd.to_datetime(["2025-01-14", "2025-01-15", None]),
+        "Количество чеков": [120, 240, 130],
+        "Средняя сумма чека": [3500.125, 3600.5, 3550.0],
+    })
+
+
+def test_xlsx_round_trip_with_text_dates(tmp_path, forecast_df):
+    path = tmp_path / "forecast.xlsx"
+    ExcelExporter.write(
+        forecast_df, path, number_formats={"Средняя сумма чека": "0.00"}, text_date_columns=["Дата"]
+    )
+
+    ws = load_workbook(path).active
+    rows = list(ws.iter_rows(values_only=True))
+    assert rows[0] == ("Дата", "Количество чеков", "Средняя сумма чека")
+    assert rows[1:] == [
+        ("2025-01-14", 120, 3500.125),
+        ("2025-01-15", 240, 3600.5),
+        (None, 130, 3550.0),
+    ]
+    assert ws["A2"].number_format == "@" and ws["A2"].data_type == "s"
+    assert ws["C2"].number_format == "0.00"
+
+    pd.testing.assert_frame_equal(
+        pd.read_excel(path, dtype={"Дата": str}),
+        forecast_df.assign(Дата=["2025-01-14", "2025-01-15", None]),
+        check_dtype=False,
+    )
+
+
+def test_unparsed_values_stay_as_text(tmp_path):
+    path = tmp_path / "forecast.csv"
+    ExcelExporter.write(pd.DataFrame({"Дата": ["2025-01-15", "итого"]}), path, text_date_columns=["Дата"],
+                        date_format="%d.%m.%Y")
+    assert path.read_text(encoding="utf-8").splitlines() == ["Дата", "15.01.2025", "итого"]
+
+
+def test_unknown_format_is_rejected(tmp_path, forecast_df):
+    with pytest.raises(ValueError):
+        ExcelExporter.write(forecast_df, tmp_path / "forecast.txt")
@@ -0,0 +1,31 @@
+# tests/test_incremental.py
+import numpy as np
+import pytest
+
+from conftest import SALES
+from sales_forecast.forecast import SalesForecaster
+from sales_forecast.incremental import IncrementalForecaster
+
+PERIOD = {"start_date": "2024-03-01", "end_date": "2025-02-28"}
+
+
+@pytest.mark.parametrize("model", ["poly", "weekly"])
+def test_save_load_update_matches_full_refit(history, tmp_path, model):
+    split = len(history) * 2 // 3
+    state = IncrementalForecaster.from_history(history.iloc[:split], model=model)
+    state.save(tmp_path / "state.npz")
+
+    restored = IncrementalForecaster.load(tmp_path / "state.npz").update(history.iloc[split:])
+    expected = SalesForecaster(history).forecast(plot=False, model=model, **PERIOD)
+    actual = restored.forecast(**PERIOD)
+
+    assert restored.model.name == model
+    assert actual["Дата"].tolist() == expected["Дата"].tolist()
+    np.testing.assert_array_equal(actual["Количество чеков"], expected["Количество чеков"])
+    np.testing.assert_allclose(actual[SALES], expected[SALES], rtol=1e-9)
+
+
+def test_update_rejects_rows_before_history(history):
+    state = IncrementalForecaster.from_history(history.iloc[100:])
+    with pytest.raises(ValueError):
+        state.update(history.iloc[:10])
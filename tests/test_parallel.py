@@ -0,0 +1,42 @@
+# tests/test_parallel.py
+import pandas as pd
+
+from sales_forecast.batch import BatchForecaster
+from sales_forecast.parallel import forecast_files, forecast_stores, run_parallel
+from synthetic import write_export
+
+
+def _fail_on_odd(value):
+    if value % 2:
+        raise ValueError(f"нечетное {value}")
+    return value * 10
+
+
+def test_run_parallel_keeps_order_and_reports_failures():
+    results = run_parallel(_fail_on_odd, range(7), workers=2, chunksize=2)
+    assert [result.key for result in results] == list(range(7))
+    assert [result.value for result in results if result.ok] == [0, 20, 40, 60]
+    assert all("нечетное" in result.error for result in results if not result.ok)
+
+
+def test_forecast_files_uses_requested_horizon(tmp_path, history):
+    paths = [tmp_path / "north.xlsx", tmp_path / "missing.xlsx", tmp_path / "south.xlsx"]
+    write_export(history, paths[0])
+    write_export(history, paths[2])
+
+    combined, failures = forecast_files(paths, workers=1, start_date="2024-03-01", end_date="2024-03-31")
+    assert [failure.key for failure in failures] == [paths[1]]
+    assert list(combined["store_id"].unique()) == ["north", "south"]
+    assert combined["Дата"].min() == "2024-03-01" and combined["Дата"].max() == "2024-03-31"
+
+
+def test_forecast_stores_matches_single_batch(stores_history):
+    combined, failures = forecast_stores(
+        stores_history, workers=2, stores_per_task=1, start_date="2024-03-01", end_date="2024-06-30",
+        floor_factor=0.5
+    )
+    assert failures == []
+    assert combined["Дата"].nunique() == 122
+
+    expected = BatchForecaster(stores_history).forecast("2024-03-01", "2024-06-30", floor_factor=0.5)
+    pd.testing.assert_frame_equal(combined, expected, check_dtype=False)
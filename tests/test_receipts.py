@@ -0,0 +1,55 @@
+# tests/test_receipts.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from sales_forecast.receipts import aggregate_receipts, ingest_receipts
+
+
+@pytest.fixture
+def receipts():
+    rng = np.random.default_rng(3)
+    n = 500
+    times = pd.Timestamp("2024-03-01") + pd.to_timedelta(rng.integers(0, 10 * 24 * 3600, n), unit="s")
+    return pd.DataFrame({
+        "date": times.strftime("%Y-%m-%d %H:%M:%S"),
+        "amount": rng.integers(100, 10000, n).astype(float),
+        "store": rng.choice(["north", "south"], n),
+    })
+
+
+def expected_daily(receipts):
+    grouped = receipts.assign(date=pd.to_datetime(receipts["date"]).dt.normalize()).groupby(["store", "date"])
+    daily = grouped["amount"].agg(checks="size", total_sales="sum").reset_index()
+    daily["avg_check"] = daily["total_sales"] / daily["checks"]
+    return daily[["store", "date", "checks", "avg_check", "total_sales"]]
+
+
+def test_ingest_matches_groupby_across_files_and_chunks(tmp_path, receipts):
+    # Файлы делят один день пополам, части по 7 строк разрезают дни внутри файла
+    paths = [tmp_path / "a.csv", tmp_path / "b.csv"]
+    receipts.iloc[:250].to_csv(paths[0], index=False)
+    receipts.iloc[250:].to_csv(paths[1], index=False)
+
+    daily, failures = ingest_receipts(paths, store_column="store", chunksize=7, workers=2)
+    assert failures == []
+    pd.testing.assert_frame_equal(daily, expected_daily(receipts), check_dtype=False)
+    assert daily["checks"].sum() == len(receipts)
+
+
+def test_missing_file_is_reported(tmp_path, receipts):
+    path = tmp_path / "a.csv"
+    receipts.to_csv(path, index=False)
+    missing = tmp_path / "missing.csv"
+
+    daily, failures = ingest_receipts([path, missing], store_column="store", workers=1)
+    assert [failure.key for failure in failures] == [missing]
+    assert "FileNotFoundError" in failures[0].error
+    pd.testing.assert_frame_equal(daily, expected_daily(receipts), check_dtype=False)
+
+
+def test_unparsed_dates_raise(tmp_path):
+    path = tmp_path / "bad.csv"
+    pd.DataFrame({"date": ["2024-03-01", "вчера"], "amount": [1.0, 2.0]}).to_csv(path, index=False)
+    with pytest.raises(ValueError, match="вчера"):
+        aggregate_receipts(path)
@@ -0,0 +1,52 @@
+# tests/test_seasonal.py
+import numpy as np
+import pandas as pd
+
+from sales_forecast.data_loader import COLUMN_RENAMES
+from sales_forecast.seasonal import SeasonalProfile, leap_day_of_year
+
+
+def test_leap_day_of_year_across_february_29():
+    dates = ["2023-02-28", "2023-03-01", "2024-02-28", "2024-02-29", "2024-03-01", "2023-12-31", "2024-12-31"]
+    assert leap_day_of_year(dates).tolist() == [59, 61, 59, 60, 61, 366, 366]
+
+
+def test_profile_matches_groupby_by_month_and_day(history):
+    df = history.rename(columns=COLUMN_RENAMES)
+    profile = SeasonalProfile.from_history(df)
+
+    expected = df.groupby([df["date"].dt.month, df["date"].dt.day])[["checks", "avg_check"]].max()
+    days = pd.to_datetime([f"2024-{month:02d}-{day:02d}" for month, day in expected.index])
+    np.testing.assert_allclose(profile.floor(days, factor=1.0), expected.to_numpy())
+
+    # История 2022-03-01..2024-02-28 без 29 февраля: у слота 60 нет данных (граница 0),
+    # 28 февраля и 1 марта не сдвигаются в него
+    floor = profile.floor(pd.to_datetime(["2024-02-28", "2024-02-29", "2024-03-01"]), factor=1.0)
+    assert floor[1].tolist() == [0.0, 0.0]
+    assert (floor[[0, 2]] > 0).all()
+
+
+def test_last_year_fifteenth_sums_across_year_boundary(history):
+    df = history.rename(columns=COLUMN_RENAMES)
+    profile = SeasonalProfile.from_history(df)
+    dates = pd.to_datetime(["2023-12-15", "2024-01-15", "2024-02-15", "2025-01-15"])
+
+    sums = df[df["date"].dt.day == 15].set_index("date")["total_sales"]
+    expected = [sums[pd.Timestamp("2022-12-15")], sums[pd.Timestamp("2023-01-15")],
+                sums[pd.Timestamp("2023-02-15")], sums[pd.Timestamp("2024-01-15")]]
+    np.testing.assert_allclose(profile.last_year_fifteenth_sums(dates), expected)
+
+
+def test_stacked_profile_matches_single_profiles(tmp_path, stores_history):
+    df = stores_history.rename(columns=COLUMN_RENAMES)
+    stacked = SeasonalProfile.from_history(df, store_column="store_id")
+    path = tmp_path / "profile.npz"
+    stacked.save(path)
+    loaded = SeasonalProfile.load(path)
+    days = pd.date_range("2024-01-01", "2024-12-31")
+
+    for store, rows in df.groupby("store_id"):
+        single = SeasonalProfile.from_history(rows)
+        part = loaded.take([store])
+        np.testing.assert_array_equal(part.floor(days)[0], single.floor(days))
+        np.testing.assert_array_equal(part.last_year_fifteenth_sums(days)[0], single.last_year_fifteenth_sums(days))
@@ -0,0 +1,54 @@
+# tests/test_service.py
+import asyncio
+import io
+import json
+
+import pandas as pd
+import pytest
+
+from sales_forecast.forecast import SalesForecaster
+from sales_forecast.service import MAX_BOOT, ForecastService, RequestError, parse_history
+
+
+@pytest.fixture
+def service():
+    service = ForecastService(workers=1)
+    yield service
+    service.close()
+
+
+def post(service, body, fmt="json"):
+    return asyncio.run(service.dispatch(
+        "POST", f"/forecast?format={fmt}", {"content-type": "application/json"}, json.dumps(body).encode("utf-8")
+    ))
+
+
+def test_forecast_round_trip_matches_forecaster(service, history):
+    records = json.loads(history.to_json(orient="records", date_format="iso"))
+    status, _, payload, extra = post(service, {"history": records, "start": "2024-03-01", "end": "2024-05-31"})
+    assert status == 200 and extra["X-Cache"] == "miss"
+
+    expected = SalesForecaster(parse_history(records=records)).forecast("2024-03-01", "2024-05-31", plot=False)
+    result = pd.read_json(io.BytesIO(payload), orient="records", dtype={"Дата": str})
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_horizon_and_format_changes_reuse_fitted_model(service, history):
+    records = json.loads(history.to_json(orient="records", date_format="iso"))
+    body = {"history": records, "start": "2024-03-01", "end": "2024-05-31"}
+    post(service, body)
+    post(service, {**body, "end": "2024-12-31", "floor_factor": 0.5})
+    assert service.models.stats() == {"items": 1, "hits": 1, "misses": 1}
+
+    # Тот же прогноз в другом формате: прогноз из кэша, сериализуется один раз на формат
+    _, _, csv_payload, extra = post(service, body, fmt="csv")
+    assert extra["X-Cache"] == "hit"
+    assert post(service, body, fmt="csv")[2] == csv_payload
+    assert service.responses.stats()["hits"] == 1
+
+
+def test_n_boot_above_limit_is_rejected(service, history):
+    records = json.loads(history.to_json(orient="records", date_format="iso"))
+    with pytest.raises(RequestError) as error:
+        post(service, {"history": records, "n_boot": MAX_BOOT + 1})
+    assert error.value.status == 400
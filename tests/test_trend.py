@@ -0,0 +1,35 @@
+# tests/test_trend.py
+import numpy as np
+
+from sales_forecast.trend import bootstrap_predict, design_matrix
+
+
+def test_bootstrap_matches_naive_residual_bootstrap():
+    rng = np.random.default_rng(0)
+    day_numbers = np.arange(1, 201)
+    # Неравномерная дисперсия: остатки в конце ряда крупнее
+    targets = np.column_stack([
+        100 + 0.5 * day_numbers + rng.normal(0, 1 + day_numbers / 20),
+        3000 + day_numbers + rng.normal(0, 50, len(day_numbers)),
+    ])
+    forecast_day_numbers = np.arange(201, 231)
+    n_boot, seed = 50, 7
+
+    actual = bootstrap_predict(day_numbers, targets, forecast_day_numbers, n_boot=n_boot, seed=seed)
+
+    # Явный цикл: обучение на fitted + residuals[picks[b]] и случайный остаток на каждый день прогноза
+    x = design_matrix(day_numbers)
+    coef = np.linalg.lstsq(x, targets, rcond=None)[0]
+    fitted = x @ coef
+    residuals = targets - fitted
+    draws = np.random.default_rng(seed)
+    picks = draws.integers(0, len(day_numbers), size=(n_boot, len(day_numbers)))
+    noise_picks = draws.integers(0, len(day_numbers), size=(n_boot, len(forecast_day_numbers)))
+    expected = np.stack([
+        design_matrix(forecast_day_numbers) @ np.linalg.lstsq(x, fitted + residuals[picks[b]], rcond=None)[0]
+        + residuals[noise_picks[b]]
+        for b in range(n_boot)
+    ])
+
+    assert actual.shape == (n_boot, len(forecast_day_numbers), 2)
+    np.testing.assert_allclose(actual, expected, rtol=1e-7, atol=1e-6)
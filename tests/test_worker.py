@@ -0,0 +1,29 @@
+# tests/test_worker.py
+from sales_forecast.forecast import CHECKPOINT_PROGRESS, SalesForecaster
+from sales_forecast.worker import BackgroundTask
+
+
+def run(task):
+    task.start()
+    task._thread.join()
+    return task.poll()
+
+
+def test_forecast_checkpoints_move_progress(history):
+    forecaster = SalesForecaster(history)
+    task = BackgroundTask([
+        ("Прогноз", lambda _: forecaster.forecast(plot=False, checkpoint=task.checkpoint), CHECKPOINT_PROGRESS),
+    ])
+    events = run(task)
+    percents = [payload[0] for event, payload in events if event == "progress"]
+    assert percents == [0.0] + [100.0 * fraction for fraction in CHECKPOINT_PROGRESS.values()] + [100.0]
+    assert events[-1][0] == "done"
+
+
+def test_stages_without_fractions_report_midpoints():
+    events = run(BackgroundTask([("a", lambda _: 1), ("b", lambda x: x + 1)]))
+    assert events == [
+        ("progress", (25.0, "a")), ("progress", (50.0, "a")),
+        ("progress", (75.0, "b")), ("progress", (100.0, "b")),
+        ("done", 2),
+    ]